@@ -0,0 +1,161 @@
+__author__ = 'Kara Schechtman <kws2121@columbia.edu>, Serina Chang <sc3003@columbia.edu>'
+__date__ = 'Oct 19, 2026'
+
+import os
+import sys
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, 'preprocessing'))
+
+from agarwal_data_manager import _extract_characters, CHARACTER, DIALOGUE, NUM_METADATA_LINES
+import argparse
+from collections import OrderedDict
+from itertools import islice
+from name_normalization import variant_to_root
+import random
+import time
+import tracemalloc
+
+"""Checks that _extract_characters in agarwal_data_manager gives the same
+characters and line data as the original, text-keeping extractor, and
+compares their throughput in script lines per second and their peak memory.
+Scripts are read from a directory of Agarwal files or, without one,
+generated. e.g.
+    python benchmarks/extract_characters.py --data_dir data/movies/agarwal_with_metadata"""
+
+NUM_SYNTHETIC = 200  # scripts
+REPEAT = 3
+
+def reference_extract_characters(script):
+    """
+    The original extractor, which keeps the text of every line and
+    counts its words at the end. Returns (name, line_data) pairs.
+    """
+    name = None
+    dialogue = ''
+    names = OrderedDict()
+    for datum in script:
+        if datum.startswith(CHARACTER):
+            if name in names.keys():
+                names[name].append(dialogue.strip())
+            else:
+                names[name] = [dialogue.strip()]
+            name = variant_to_root(datum.split(CHARACTER)[1].strip())
+            dialogue = ''
+        if datum.startswith(DIALOGUE):
+            dialogue += ' ' + datum.split(DIALOGUE)[1].strip()
+    characters = []
+    for name in names:
+        line_data = []
+        for line in names[name]:
+            words = line.split()
+            if len(words) != 0:
+                line_data.append(len(words))
+        if len(line_data) != 0:
+            characters.append((name, line_data))
+    return characters
+
+def current_extract_characters(script):
+    return [(c.name, c.line_data) for c in _extract_characters(script)]
+
+# ----------------------- SCRIPTS -----------------------
+def load_scripts(data_dir):
+    """
+    Returns (filename, script lines) for every Agarwal file in data_dir.
+    """
+    scripts = []
+    for fn in sorted(os.listdir(data_dir)):
+        if fn.endswith('.txt'):
+            with open(os.path.join(data_dir, fn), 'r') as f:
+                scripts.append((fn, list(islice(f, NUM_METADATA_LINES, None))))
+    return scripts
+
+def make_synthetic_scripts(num_scripts=NUM_SYNTHETIC, seed=0):
+    """
+    Returns (name, script lines) for num_scripts generated scripts, with the
+    cases the extractors must agree on: dialogue before the first character,
+    empty and multi-line dialogue, name variants, stray D| in dialogue and
+    scene lines.
+    """
+    rng = random.Random(seed)
+    names = ['JOHN', 'MARY (V.O.)', 'Mary', "CATE'S VOICE", "CHRIS' VOICE", 'BOB:', 'DR. SMITH', 'ALICE voice-over']
+    words = ['the', 'a', 'word', 'longer-word', "don't", '...', 'D|', '\tspaced']
+    scripts = []
+    for i in range(num_scripts):
+        script = ['\n']
+        if rng.random() < .2:
+            script.append('D|before anyone speaks\n')
+        for _ in range(rng.randint(500, 3000)):
+            script.append('{}{}\n'.format(CHARACTER, rng.choice(names)))
+            for _ in range(rng.choice([0, 1, 1, 1, 2, 3])):
+                script.append('{} {}  \n'.format(DIALOGUE, ' '.join([rng.choice(words) for _ in range(rng.randint(0, 15))])))
+            if rng.random() < .3:
+                script.append('S|INT. HOUSE - NIGHT\n')
+        scripts.append(('synthetic_{}'.format(i), script))
+    return scripts
+
+# ----------------------- CHECKS -----------------------
+def check_scripts(scripts):
+    """
+    Primary function. Runs both extractors on every script. Returns the
+    names of the scripts where they differ.
+    """
+    mismatches = []
+    for name, script in scripts:
+        if reference_extract_characters(script) != current_extract_characters(script):
+            mismatches.append(name)
+            print('MISMATCH', name)
+    return mismatches
+
+def time_extraction(scripts, repeat=REPEAT):
+    """
+    Returns script lines per second for the reference and the current
+    extractor, as (reference, current).
+    """
+    num_lines = sum([len(script) for _, script in scripts])
+    rates = []
+    for extract_fn in [reference_extract_characters, _extract_characters]:
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _, script in scripts:
+                extract_fn(script)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        rates.append(num_lines / best)
+    return tuple(rates)
+
+def peak_memory(scripts):
+    """
+    Returns the peak memory, in bytes, that the reference and the current
+    extractor allocate on the longest script, as (reference, current).
+    """
+    _, script = max(scripts, key=lambda s: len(s[1]))
+    peaks = []
+    for extract_fn in [reference_extract_characters, _extract_characters]:
+        tracemalloc.start()
+        extract_fn(script)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return tuple(peaks)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Check and time character extraction from Agarwal scripts.')
+    parser.add_argument('--data_dir', help='directory of Agarwal files; generated scripts are used otherwise')
+    parser.add_argument('--num_scripts', type=int, default=NUM_SYNTHETIC)
+    parser.add_argument('--repeat', type=int, default=REPEAT)
+    args = parser.parse_args()
+
+    if args.data_dir:
+        scripts = load_scripts(args.data_dir)
+    else:
+        scripts = make_synthetic_scripts(args.num_scripts)
+    mismatches = check_scripts(scripts)
+    print('{} scripts checked, {} mismatches'.format(len(scripts), len(mismatches)))
+    reference, current = time_extraction(scripts, args.repeat)
+    print('reference: {:>10.0f} lines/s  current: {:>10.0f} lines/s  speedup: {:.2f}x'.format(
+          reference, current, current / reference))
+    reference, current = peak_memory(scripts)
+    print('peak memory on the longest script: reference {:.1f} KB, current {:.1f} KB'.format(reference / 1e3, current / 1e3))
+    if mismatches:
+        sys.exit(1)
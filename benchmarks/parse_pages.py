@@ -0,0 +1,165 @@
+__author__ = 'Kara Schechtman <kws2121@columbia.edu>, Serina Chang <sc3003@columbia.edu>'
+__date__ = 'Oct 19, 2026'
+
+import os
+import sys
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, 'preprocessing'))
+
+import argparse
+from make_data import *
+from page_parsing import compare_parses, page_kind, parse_page, FAST_PARSER
+import random
+import time
+from urllib.parse import unquote
+
+"""Checks that selective parsing of IMDb pages gives the same extracted data
+as parsing whole pages, and compares their speed in pages per second.
+Pages are read from a fixture directory (see preprocessing/fixture_server.py),
+by default the saved pages in benchmarks/fixtures/imdb, together with
+generated ones. The saved pages follow the 2019 IMDb markup make_data was
+written for, including the unclosed and stray tags the two parsers may
+repair differently; pages from a real scrape can be added with
+fixture_server.py --export_from. e.g.
+    python benchmarks/parse_pages.py --fixtures data/fixtures --num_pages 0"""
+
+# Page kind mapped to a function returning everything make_data extracts from it.
+EXTRACTORS = {
+    'search': lambda page: extract_search_result_urls(page, top_n=1000),
+    'title': lambda page: (extract_imdb_id(page), extract_imdb_headings(page),
+                           extract_imdb_rating(page), extract_imdb_char_names(page)),
+    'credits': extract_credit_rows,
+    'bio': predict_gender_from_bio,
+}
+FIXTURE_DIR = os.path.join(ROOT, 'benchmarks', 'fixtures', 'imdb')
+NUM_SYNTHETIC = 50  # pages of each kind
+REPEAT = 3
+
+def _safe_extract(extract_fn):
+    """
+    Wraps an extractor so that an exception becomes part of its result,
+    since both parses should fail the same way.
+    """
+    def extract(page):
+        try:
+            return extract_fn(page)
+        except Exception as e:
+            return 'raised {}'.format(type(e).__name__)
+    return extract
+
+# ----------------------- PAGES -----------------------
+def load_fixture_pages(fixture_dir):
+    """
+    Returns (path, kind, content) for every fixture page of a known kind.
+    """
+    pages = []
+    for fn in sorted(os.listdir(fixture_dir)):
+        if fn.endswith('.html'):
+            path = unquote(fn[:-len('.html')])
+            kind = page_kind(path)
+            if kind is not None:
+                with open(os.path.join(fixture_dir, fn), 'rb') as f:
+                    pages.append((path, kind, f.read()))
+    return pages
+
+def _filler(rng, num_blocks):
+    """
+    Markup the extractors ignore, standing in for navigation, ads and scripts.
+    """
+    blocks = []
+    for i in range(num_blocks):
+        blocks.append('<div class="nav-block"><ul>{}</ul><script>var x{} = {};</script></div>'.format(
+                      ''.join(['<li><a href="/link/{}">Link {}</a></li>'.format(j, j) for j in range(10)]),
+                      i, rng.random()))
+    return ''.join(blocks)
+
+def make_synthetic_pages(num_pages=NUM_SYNTHETIC, seed=0):
+    """
+    Returns (path, kind, content) for num_pages generated pages of each kind,
+    laid out like the IMDb pages make_data was written for.
+    """
+    rng = random.Random(seed)
+    pages = []
+    for i in range(num_pages):
+        results = ''.join(['<tr class="findResult odd"><td class="result_text"><a href="/title/tt{:07d}/">Movie {}</a></td></tr>'.format(
+                           rng.randint(1, 10**6), j) for j in range(10)])
+        pages.append(('/find?q=movie+{}&s=tt'.format(i), 'search',
+                      '<html><body>{}<table class="findList">{}</table>{}</body></html>'.format(
+                      _filler(rng, 20), results, _filler(rng, 20))))
+        cast = ''.join(['<tr><td class="character">Character {} / Other ({})</td></tr>'.format(j, j) for j in range(15)])
+        pages.append(('/title/tt{:07d}/'.format(i), 'title',
+                      '<html><head><meta property="pageId" content="tt{:07d}"/></head><body>{}'
+                      '<div class="title_wrapper"><h1>Movie {}&nbsp;<span id="titleYear">(<a href="/year/1999/">1999</a>)</span></h1>'
+                      '<div class="subtext"><a href="/search/title?genres=drama">Drama</a>, <a href="/search/title?genres=comedy">Comedy</a></div></div>'
+                      '<span itemprop="ratingValue">{}</span><table class="cast_list">{}</table>{}</body></html>'.format(
+                      i, _filler(rng, 30), i, round(rng.uniform(1, 10), 1), cast, _filler(rng, 30))))
+        directors = '<tr><td class="name"><a href="/name/nm{:07d}/">Director {}</a></td></tr>'.format(rng.randint(1, 10**6), i)
+        rows = ''.join(['<tr class="odd"><td class="primary_photo"><a href="/name/nm{:07d}/"><img/></a></td><td><a>Actor {}</a></td>'
+                        '<td class="ellipsis">...</td><td class="character">Character {}, Jr. (voice)</td></tr>'.format(
+                        rng.randint(1, 10**6), j, j) for j in range(40)])
+        pages.append(('/title/tt{:07d}/fullcredits'.format(i), 'credits',
+                      '<html><body>{}<h4 class="dataHeaderWithBorder">Directed by</h4>'
+                      '<table class="simpleTable simpleCreditsTable">{}</table>'
+                      '<h4 class="dataHeaderWithBorder">Cast</h4><table class="cast_list">{}</table>{}</body></html>'.format(
+                      _filler(rng, 20), directors, rows, _filler(rng, 20))))
+        bio = ' '.join([rng.choice(['she', 'he', 'her', 'his', 'the', 'film', 'was']) for _ in range(200)])
+        pages.append(('/name/nm{:07d}/'.format(i), 'bio',
+                      '<html><body>{}<div id="name-job-categories"><a><span class="itemprop">{}</span></a></div>'
+                      '<div id="name-bio-text"><div class="inline">{}</div></div>{}</body></html>'.format(
+                      _filler(rng, 25), rng.choice(['Actress', 'Actor', 'Producer']), bio, _filler(rng, 25))))
+    return [(path, kind, content.encode('utf-8')) for path, kind, content in pages]
+
+# ----------------------- CHECKS -----------------------
+def check_pages(pages):
+    """
+    Primary function. Runs the extractors on a whole and a selective parse
+    of every page. Returns the paths of the pages where they differ.
+    """
+    mismatches = []
+    for path, kind, content in pages:
+        full, selective = compare_parses(content, kind, _safe_extract(EXTRACTORS[kind]))
+        if full != selective:
+            mismatches.append(path)
+            print('MISMATCH {}: {!r} != {!r}'.format(path, full, selective))
+    return mismatches
+
+def time_parsing(pages, repeat=REPEAT):
+    """
+    Returns pages per second for whole and selective parsing plus extraction,
+    per page kind, as {kind: (whole, selective)}.
+    """
+    rates = {}
+    for kind in EXTRACTORS:
+        kind_pages = [content for _, k, content in pages if k == kind]
+        if not kind_pages:
+            continue
+        rates[kind] = []
+        for selective in [False, True]:
+            best = None
+            for _ in range(repeat):
+                start = time.perf_counter()
+                for content in kind_pages:
+                    EXTRACTORS[kind](parse_page(content, kind, selective))
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            rates[kind].append(len(kind_pages) / best)
+    return rates
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Check and time selective parsing of IMDb pages.')
+    parser.add_argument('--fixtures', default=FIXTURE_DIR, help='directory of saved pages')
+    parser.add_argument('--num_pages', type=int, default=NUM_SYNTHETIC, help='generated pages of each kind to add')
+    parser.add_argument('--repeat', type=int, default=REPEAT)
+    args = parser.parse_args()
+
+    fixture_pages = load_fixture_pages(args.fixtures)
+    pages = fixture_pages + make_synthetic_pages(args.num_pages)
+    mismatches = check_pages(pages)
+    print('{} pages checked ({} saved), {} mismatches (selective parser: {})'.format(
+          len(pages), len(fixture_pages), len(mismatches), FAST_PARSER))
+    for kind, (full, selective) in time_parsing(pages, args.repeat).items():
+        print('{:<8} whole: {:>8.1f} pages/s  selective: {:>8.1f} pages/s  speedup: {:.2f}x'.format(
+              kind, full, selective, selective / full))
+    if mismatches:
+        sys.exit(1)
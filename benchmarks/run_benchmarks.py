@@ -0,0 +1,201 @@
+__author__ = 'Kara Schechtman <kws2121@columbia.edu>, Serina Chang <sc3003@columbia.edu>'
+__date__ = 'Oct 19, 2026'
+
+import os
+import sys
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, 'gender'))
+sys.path.append(os.path.join(ROOT, 'preprocessing'))
+
+import argparse
+from collections import OrderedDict
+import contextlib
+from data_loader import DataLoader
+import gc
+from imdb_matching import *
+import io
+import json
+import shutil
+from ssa_matching import *
+from synthetic_corpus import generate_corpus, MOVIES_DIR, SSA_DIR
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+"""Times each stage of the gender analysis on a fixed synthetic corpus at several scales.
+Run from the repository root, e.g.
+    python benchmarks/run_benchmarks.py --save bench.json
+    python benchmarks/run_benchmarks.py --baseline bench.json --threshold 0.2"""
+
+SCALES = [10, 100, 1000]  # number of movies
+REPEAT = 5
+THRESHOLD = 0.2  # allowed slowdown of the median before a stage counts as a regression
+SEED = 0
+
+# ----------------------- SYNTHETIC INPUTS -----------------------
+_temp_dirs = []  # removed once all benchmarks have run
+_corpus_dirs = {}
+
+def corpus_dir(num_movies, seed=SEED):
+    """
+    Writes a synthetic corpus of num_movies movies, with SSA files, to a
+    temporary directory once per scale and returns the directory. Metadata
+    is never missing, since the analysis stages expect every field.
+    """
+    if num_movies not in _corpus_dirs:
+        out_dir = tempfile.mkdtemp(prefix='bench_corpus_')
+        _temp_dirs.append(out_dir)
+        generate_corpus(out_dir, seed, num_movies=num_movies, gold_share=0.0, missing_rate=0.0)
+        _corpus_dirs[num_movies] = out_dir
+    return _corpus_dirs[num_movies]
+
+def load_corpus(num_movies):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return DataLoader(os.path.join(corpus_dir(num_movies), MOVIES_DIR), verbose=False)
+
+def make_movies(num_movies):
+    return list(load_corpus(num_movies).movies.values())
+
+def make_ssa_dict_synthetic():
+    return make_ssa_dict(os.path.join(corpus_dir(1), SSA_DIR))
+
+# ----------------------- STAGES -----------------------
+# Each stage takes the scale and returns a function that runs the stage once.
+def stage_data_loader(num_movies):
+    data_dir = os.path.join(corpus_dir(num_movies), MOVIES_DIR)
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            DataLoader(data_dir, verbose=False)
+    return run
+
+def stage_score_gender_ssa(num_movies):
+    ssa_dict = make_ssa_dict_synthetic()
+    movies = make_movies(num_movies)
+    def run():
+        for movie in movies:
+            for sname in movie.characters:
+                score_gender_ssa(ssa_dict, sname, movie_year=movie.year, check_decade=True)
+    return run
+
+def stage_predict_gender_imdb(num_movies):
+    movies = make_movies(num_movies)
+    def run():
+        for movie in movies:
+            predict_gender_imdb(movie, in_align, soft_backtrack)
+    return run
+
+def _stage_backtrack(assignment_fn, num_movies):
+    script_to_imdbs = [align_characters(movie, blended_align) for movie in make_movies(num_movies)]
+    def run():
+        for script_to_imdb in script_to_imdbs:
+            assignment_fn(copy_alignments(script_to_imdb))
+    return run
+
+def stage_soft_backtrack(num_movies):
+    return _stage_backtrack(soft_backtrack, num_movies)
+
+def stage_hard_backtrack(num_movies):
+    return _stage_backtrack(hard_backtrack, num_movies)
+
+def stage_cast_gender_breakdown(num_movies):
+    from oscars_analysis import compute_cast_gender_breakdown
+    corpus = load_corpus(num_movies)
+    def run():
+        compute_cast_gender_breakdown(corpus, 'genre')
+    return run
+
+STAGES = OrderedDict([('data_loader', stage_data_loader),
+                      ('score_gender_ssa', stage_score_gender_ssa),
+                      ('predict_gender_imdb', stage_predict_gender_imdb),
+                      ('soft_backtrack', stage_soft_backtrack),
+                      ('hard_backtrack', stage_hard_backtrack),
+                      ('cast_gender_breakdown', stage_cast_gender_breakdown)])
+
+# ----------------------- RUNNING -----------------------
+def _percentile(values, pct):
+    """
+    Nearest-rank percentile.
+    """
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100 * len(ordered))))
+    return ordered[rank - 1]
+
+def time_stage(run, repeat=REPEAT):
+    """
+    Times repeated runs of a stage, then measures its peak traced memory
+    in one more run (tracing slows the code down, so it is not timed).
+    """
+    run()  # warm up
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    gc.collect()
+    tracemalloc.start()
+    run()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {'median_s': statistics.median(times),
+            'p95_s': _percentile(times, 95),
+            'peak_bytes': peak}
+
+def run_benchmarks(stages=None, scales=SCALES, repeat=REPEAT):
+    """
+    Primary function. Benchmarks every stage at every scale. Returns a
+    dictionary from stage name to scale (as a string, for JSON) to timings.
+    """
+    results = OrderedDict()
+    try:
+        for name in stages or STAGES:
+            results[name] = OrderedDict()
+            for scale in scales:
+                result = time_stage(STAGES[name](scale), repeat)
+                results[name][str(scale)] = result
+                print('{:<22} {:>6} movies  median {:.4f}s  p95 {:.4f}s  peak {:.1f} KiB'.format(
+                      name, scale, result['median_s'], result['p95_s'], result['peak_bytes'] / 1024))
+    finally:
+        while _temp_dirs:
+            shutil.rmtree(_temp_dirs.pop(), ignore_errors=True)
+        _corpus_dirs.clear()
+    return results
+
+def compare_to_baseline(results, baseline, threshold=THRESHOLD):
+    """
+    Returns a list of (stage, scale, baseline median, new median) for every
+    stage whose median time grew by more than threshold (a fraction).
+    """
+    regressions = []
+    for name, per_scale in results.items():
+        for scale, result in per_scale.items():
+            old = baseline.get(name, {}).get(scale)
+            if old is not None and result['median_s'] > old['median_s'] * (1 + threshold):
+                regressions.append((name, scale, old['median_s'], result['median_s']))
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark the gender analysis stages.')
+    parser.add_argument('--stages', nargs='+', choices=list(STAGES))
+    parser.add_argument('--scales', nargs='+', type=int, default=SCALES)
+    parser.add_argument('--repeat', type=int, default=REPEAT)
+    parser.add_argument('--save', help='write results to this JSON file')
+    parser.add_argument('--baseline', help='compare against results saved in this JSON file')
+    parser.add_argument('--threshold', type=float, default=THRESHOLD)
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.stages, args.scales, args.repeat)
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(results, baseline, args.threshold)
+        for name, scale, old, new in regressions:
+            print('REGRESSION: {} at {} movies: {:.4f}s -> {:.4f}s'.format(name, scale, old, new))
+        if regressions:
+            sys.exit(1)
+        print('No regressions over {}%'.format(round(args.threshold * 100)))
@@ -0,0 +1,60 @@
+__author__ = 'Kara Schechtman <kws2121@columbia.edu>, Serina Chang <sc3003@columbia.edu>'
+__date__ = 'Oct 19, 2026'
+
+import os
+import sys
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, 'gender'))
+
+from data_loader import DataLoader
+from imdb_matching import *
+from predict_gender import SSA_DICT, _merge_dict
+from ssa_matching import *
+import time
+
+"""Compares the staged hybrid predictor to full IMDb matching on the corpus.
+Run from the repository root."""
+
+def compare_staged_hybrid(data, alignment_fn=in_align, assignment_fn=soft_backtrack):
+    """
+    Predicts every movie with full IMDb matching and with the staged
+    predictor, checks that the merged predictions are identical and
+    reports how much alignment and assignment work was skipped.
+    """
+    stats = {}
+    full_assigned = 0
+    full_time = 0
+    staged_time = 0
+    for movie in data.movies.values():
+        ssa_pred_dict = predict_gender_ssa(SSA_DICT, movie, mode='hard', check_decade=True)
+
+        start = time.perf_counter()
+        imdb_pred_dict = predict_gender_imdb(movie, alignment_fn, assignment_fn)
+        full_time += time.perf_counter() - start
+        full_pred_dict = _merge_dict(ssa_pred_dict, imdb_pred_dict, True)
+        full_assigned += len([sname for sname in movie.characters
+                              if any([alignment_fn(iname, sname) for iname in movie.imdb_cast or []])])
+
+        start = time.perf_counter()
+        imdb_pred_dict = predict_gender_imdb_staged(movie, alignment_fn, assignment_fn,
+                                                    resolved=set(ssa_pred_dict), stats=stats)
+        staged_time += time.perf_counter() - start
+        staged_pred_dict = _merge_dict(ssa_pred_dict, imdb_pred_dict, True)
+
+        assert staged_pred_dict == full_pred_dict, movie.title
+
+    print('STAGED HYBRID: %s assignment with %s alignment' % (assignment_fn.__name__, alignment_fn.__name__))
+    print('Alignment calls: {} staged / {} full ({}% skipped)'.format(
+          stats['alignments'], stats['full_alignments'],
+          round(100 - stats['alignments']/max(stats['full_alignments'], 1) * 100, 2)))
+    print('Characters assigned: {} staged / {} full'.format(stats['assigned'], full_assigned))
+    print('IMDb time: {}s staged / {}s full'.format(round(staged_time, 3), round(full_time, 3)))
+    print('----------------------------')
+
+if __name__ == "__main__":
+    data = DataLoader(verbose=False)
+    compare_staged_hybrid(data, in_align, soft_backtrack)
+    compare_staged_hybrid(data, threshold_align, soft_backtrack)
+    compare_staged_hybrid(data, blended_align, soft_backtrack)
+    compare_staged_hybrid(data, in_align, baseline_assign)
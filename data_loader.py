@@ -16,6 +16,8 @@ import os
 from character import Character
 from collections import OrderedDict
 from movie import Movie
+from name_normalization import canonical_name
+from tracing import span
 
 class DataLoader(object):
     """
@@ -26,32 +28,10 @@ class DataLoader(object):
         self.movies = {}
         data_dir = os.path.join(os.getcwd(), data_path)
 
-        for filename in os.listdir(data_dir):
-            if filename.endswith('.txt'):
-                filepath = os.path.join(data_dir, filename)
-                with open(filepath, 'r') as file:
-                    lines = file.readlines()
-                    _check_metadata_format(lines, filename)
-                    # Get metadata.
-                    imdb = _read_field(lines[0])
-                    title = _read_field(lines[1])
-                    if verbose:
-                        print('Loading %s...' % (title) )
-                    year = _read_field(lines[2], cast_fn=int)
-                    genre = _read_field(lines[3], split=True)
-                    director = _read_field(lines[4])
-                    rating = _read_field(lines[5], cast_fn=float)
-                    bechdel_score = _read_field(lines[6], cast_fn=int)
-                    imdb_cast_list = _read_field(lines[7], split=True)
-                    imdb_cast = _process_imdb_cast(imdb_cast_list)
-                    oscar_winner = _process_oscar_winner(lines[8])
-                    characters = _extract_characters(lines[9:])
-
-                # Create movie object and save.
-                self.movies[title] = Movie(imdb, title, year,
-                                           genre, director, rating,
-                                           bechdel_score, imdb_cast,
-                                           oscar_winner, characters)
+        with span('load_corpus', path=data_path):
+            for filepath in iter_movie_files(data_dir):
+                movie = load_movie_file(filepath, verbose)
+                self.movies[movie.title] = movie
         print('All data loaded!')
         print('----------------------------')
 
@@ -62,6 +42,48 @@ class DataLoader(object):
         """
         return self.movies[title]
 
+def iter_movie_files(data_dir):
+    """
+    Yields the path of every movie file in a data directory.
+    """
+    for filename in os.listdir(data_dir):
+        if filename.endswith('.txt'):
+            yield os.path.join(data_dir, filename)
+
+def load_movie_file(filepath, verbose=False):
+    """
+    Reads one movie file into a Movie object.
+    """
+    filename = os.path.basename(filepath)
+    with span('load_movie', file=filename) as load_span:
+        with span('read_file', file=filename):
+            with open(filepath, 'r') as file:
+                lines = file.readlines()
+        _check_metadata_format(lines, filename)
+        # Get metadata.
+        imdb = _read_field(lines[0])
+        title = _read_field(lines[1])
+        if verbose:
+            print('Loading %s...' % (title) )
+        year = _read_field(lines[2], cast_fn=int)
+        genre = _read_field(lines[3], split=True)
+        director = _read_field(lines[4])
+        rating = _read_field(lines[5], cast_fn=float)
+        bechdel_score = _read_field(lines[6], cast_fn=int)
+        imdb_cast_list = _read_field(lines[7], split=True)
+        with span('process_imdb_cast', movie=title):
+            imdb_cast = _process_imdb_cast(imdb_cast_list)
+        oscar_winner = _process_oscar_winner(lines[8])
+        with span('extract_characters', movie=title):
+            characters = _extract_characters(lines[9:])
+        load_span.set(movie=title, cast_size=len(imdb_cast or ()), num_chars=len(characters))
+
+    # Create movie object.
+    return Movie(imdb, title, year,
+                 genre, director, rating,
+                 bechdel_score, imdb_cast,
+                 oscar_winner, characters)
+
 def _read_field(line, cast_fn = None, split = False):
     """
     Helper function to handle retrieve field value from the text file.
@@ -106,8 +128,8 @@ def _process_imdb_cast(imdb_cast_list):
         dup_character_names = set()
         for entry in imdb_cast_list:
             c = entry.split(' | ')
-            char_name = c[0].lower().strip()
-            actor_name = c[1].split('(')[0].lower().strip()
+            char_name = canonical_name(c[0])
+            actor_name = canonical_name(c[1].split('(')[0])
             gender = c[1].split('(')[-1].strip(')')
             if char_name in imdb_cast: # first duplicate character
                 # Handle the old duplicate
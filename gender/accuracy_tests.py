@@ -2,61 +2,18 @@ __author__ = 'Serina Chang <sc3003@columbia.edu>'
 __date__ = 'Jan 20, 2019'
 
 from data_loader import DataLoader
+from functools import partial
+from gender_metrics import *
+from gold_labels import *
 from imdb_matching import *
-import numpy as np
+from parallel_eval import map_ordered
 from ssa_matching import *
-from sklearn.metrics import accuracy_score
 
 """Testing gender prediction accuracy on gold labels."""
 
 VERBOSE = False
 
 # ----------------------- GENERAL UTILITIES -----------------------
-PATH_TO_GOLD_LABELS = './data/gold_labels/'
-
-def gender_to_idx(gender):
-    if gender == 'UNK':
-        return 0
-    if gender == 'F':
-        return 1
-    if gender == 'M':
-        return 2
-    if gender == 'BOTH':
-        return 3
-    return -1
-
-def parse_annotated_alignment_file(filename):
-    with open(PATH_TO_GOLD_LABELS + filename, 'r') as f:
-        char_dict = {}
-        for line in f.readlines():
-            sname_gen, alignment = line.split(' -> ', 1)
-            sname, gen = sname_gen.split(' (', 1)
-            gen = gen.rstrip(')')
-            alignment = alignment.strip()
-            if alignment.startswith('POSSIBILITIES '):
-                certain = False
-                inames = alignment.strip('POSSIBILITIES ').split(', ')
-            elif alignment == 'N/A':
-                certain = True
-                inames = None
-            elif ', ' in alignment:
-                certain = True
-                inames = alignment.split(', ')
-            else:
-                certain = True
-                inames = alignment
-            char_dict[sname] = (gen, inames, certain)
-        return char_dict
-
-def parse_annotated_gendered_file(filename):
-    with open(PATH_TO_GOLD_LABELS + filename, 'r') as f:
-        char_dict = {}
-        for line in f.readlines():
-            sname, gen = line.strip().split(' (', 1)
-            gen = gen.rstrip(')')
-            char_dict[sname] = gen
-        return char_dict
-
 def merge_dict(ssa_pred_dict, imdb_pred_dict, ssa_trumps=True):
     ssa_pred_names = set()
     for sname, gen in ssa_pred_dict.items():
@@ -80,160 +37,99 @@ def merge_dict(ssa_pred_dict, imdb_pred_dict, ssa_trumps=True):
     return merged_dict
 
 # ----------------------- TESTS -----------------------
+def _acc_for_pred_dict(gold_dict, pred_dict):
+    """
+    Compares the male and female predictions for the labeled characters
+    of a movie to their gold labels. Returns a ConfusionMatrix.
+    """
+    matrix = ConfusionMatrix()
+    for sname, gen in pred_dict.items():
+        if sname in gold_dict:
+            if gen == 'M' or gen == 'F':
+                matrix.add(gold_dict[sname][0], gen)
+    return matrix
+
+def _run_acc_test(data, movie_fn, workers, gold_labels):
+    """
+    Calls movie_fn(gold_dict, movie) for every labeled movie, on a pool
+    of processes if workers is greater than 1, and adds up the returned
+    confusion matrices in directory order. Returns an
+    AccuracyAccumulator.
+    """
+    if gold_labels is None:
+        gold_labels = get_gold_label_store()
+    labeled_movies = gold_labels.labeled_movies(data)
+    movie_matrices = map_ordered(movie_fn, [(gold_dict, movie) for title, gold_dict, movie in labeled_movies], workers)
+    results = AccuracyAccumulator()
+    for (title, gold_dict, movie), matrix in zip(labeled_movies, movie_matrices):
+        results.add_movie(matrix, len(gold_dict))
+        if VERBOSE:
+            if matrix.accuracy() is None:
+                print('Movie: {}. Could not make successful gender alignments.'.format(title))
+            else:
+                print('Movie: {}. Accuracy: {} ({} out of {} characters)'.format(title, round(matrix.accuracy(), 4),
+                                                                                  matrix.total(), len(gold_dict)))
+    return results
+
+def _print_acc_results(results):
+    print('Average accuracy: {}. Characters covered: {} / {}%'.format(round(results.macro_accuracy(), 4),
+                                                                     results.num_covered(),
+                                                                     round(results.coverage() * 100, 2)))
+    if results.num_covered() > 0:
+        print('Micro accuracy: {}. F precision / recall: {} / {}. M precision / recall: {} / {}'.format(
+              *[None if x is None else round(x, 4) for x in
+                [results.micro_accuracy(),
+                 results.matrix.precision('F'), results.matrix.recall('F'),
+                 results.matrix.precision('M'), results.matrix.recall('M')]]))
+        print('Macro F precision / recall: {} / {}. M precision / recall: {} / {}'.format(
+              *[None if x is None else round(x, 4) for x in
+                [results.macro_precision('F'), results.macro_recall('F'),
+                 results.macro_precision('M'), results.macro_recall('M')]]))
+    print('----------------------------')
+
 def _test_assignment_acc_for_movie(gold_dict, movie, alignment_fn, assignment_fn):
     pred_dict = predict_gender_imdb(movie, alignment_fn, assignment_fn)
-    ordered_snames = sorted(list(pred_dict.keys()))
-    gold_labels = []
-    pred_labels = []
-    for sname in ordered_snames:
-        if sname in gold_dict:
-            pred_labels.append(pred_dict[sname])
-            gold_labels.append(gold_dict[sname][0])
-    if len(gold_labels) == 0:   # could not predict genders for any characters
-        return None, 0
-    acc = accuracy_score(gold_labels, pred_labels)
-    return acc, len(gold_labels)
+    return _acc_for_pred_dict(gold_dict, pred_dict)
 
-def test_assignment_acc_for_all_labeled_movies(data, alignment_fn, assignment_fn):
+def test_assignment_acc_for_all_labeled_movies(data, alignment_fn, assignment_fn, workers=None, gold_labels=None):
     print('IMDB ACCURACY TEST: alignment = {}, assignment = {}'.format(alignment_fn.__name__, assignment_fn.__name__))
-    accs = []
-    total_num_covered = 0
-    total_num_chars = 0
-    for fn in os.listdir(PATH_TO_GOLD_LABELS):
-        if fn.endswith(' ALIGNED.txt') or fn.endswith(' GENDERED.txt'):
-            if fn.endswith(' ALIGNED.txt'):
-                gold_dict = parse_annotated_alignment_file(fn)
-                title = fn.split(' ALIGNED.txt', 1)[0].replace('_', '\'')
-            else:
-                gold_dict = parse_annotated_gendered_file(fn)
-                title = fn.split(' GENDERED.txt', 1)[0].replace('_', '\'')
-            num_chars = len(gold_dict)
-            total_num_chars += num_chars
-            movie = data.get_movie(title)
-            assert(movie is not None)
-            acc, num_covered = _test_assignment_acc_for_movie(gold_dict, movie, alignment_fn, assignment_fn)
-            if acc is None:
-                if VERBOSE:
-                    print('Movie: {}. Could not make successful gender alignments.'.format(title))
-            else:
-                if VERBOSE:
-                    print('Movie: {}. Accuracy: {} ({} out of {} characters)'.format(title, round(acc, 4), num_covered, num_chars))
-                accs.append(acc)
-                total_num_covered += num_covered
-    print('Average accuracy: {}. Characters covered: {} / {}%'.format(round(np.mean(accs), 4),
-                                                                     total_num_covered,
-                                                                     round(total_num_covered/total_num_chars * 100, 2)))
-    print('----------------------------')
+    movie_fn = partial(_test_assignment_acc_for_movie, alignment_fn=alignment_fn, assignment_fn=assignment_fn)
+    _print_acc_results(_run_acc_test(data, movie_fn, workers, gold_labels))
 
 def _test_ssa_acc_for_movie(gold_dict, movie, ssa_dict, mode, check_decade):
     pred_dict = predict_gender_ssa(ssa_dict, movie, mode, check_decade)
-    ordered_snames = sorted(list(pred_dict.keys()))
-    gold_labels = []
-    pred_labels = []
-    for sname in ordered_snames:
-        if sname in gold_dict:
-            if pred_dict[sname] == 'M' or pred_dict[sname] == 'F':
-                gold_labels.append(gold_dict[sname][0])
-                pred_labels.append(pred_dict[sname])
-    if len(gold_labels) == 0:   # could not predict genders for any characters
-        return None, 0
-    acc = accuracy_score(gold_labels, pred_labels)
-    return acc, len(gold_labels)
+    return _acc_for_pred_dict(gold_dict, pred_dict)
 
-def test_ssa_acc_for_all_labeled_movies(data, mode, check_decade):
+def test_ssa_acc_for_all_labeled_movies(data, mode, check_decade, workers=None, gold_labels=None):
     ssa_dict = make_ssa_dict()
     print('SSA ACCURACY TEST: mode = {}, decade = {}'.format(mode, check_decade))
-    accs = []
-    total_num_covered = 0
-    total_num_chars = 0
-    for fn in os.listdir(PATH_TO_GOLD_LABELS):
-        if fn.endswith(' ALIGNED.txt') or fn.endswith(' GENDERED.txt'):
-            if fn.endswith(' ALIGNED.txt'):
-                gold_dict = parse_annotated_alignment_file(fn)
-                title = fn.split(' ALIGNED.txt', 1)[0].replace('_', '\'')
-            else:
-                gold_dict = parse_annotated_gendered_file(fn)
-                title = fn.split(' GENDERED.txt', 1)[0].replace('_', '\'')
-            num_chars = len(gold_dict)
-            total_num_chars += num_chars
-            movie = data.get_movie(title)
-            assert(movie is not None)
-            acc, num_covered = _test_ssa_acc_for_movie(gold_dict, movie, ssa_dict, mode, check_decade)
-            if acc is None:
-                if VERBOSE:
-                    print('Movie: {}. Could not make successful gender alignments.'.format(title))
-            else:
-                if VERBOSE:
-                    print('Movie: {}. Accuracy: {} ({} out of {} characters)'.format(title, round(acc, 4), total_num_covered, num_chars))
-                accs.append(acc)
-                total_num_covered += num_covered
-    print('Average accuracy: {}. Characters covered: {} / {}%'.format(round(np.mean(accs), 4),
-                                                                     total_num_covered,
-                                                                     round(total_num_covered/total_num_chars * 100, 2)))
-    print('----------------------------')
+    movie_fn = partial(_test_ssa_acc_for_movie, ssa_dict=ssa_dict, mode=mode, check_decade=check_decade)
+    _print_acc_results(_run_acc_test(data, movie_fn, workers, gold_labels))
 
 def _test_hybrid_acc_for_movie(gold_dict, movie, ssa_dict, ssa_trump):
     imdb_pred_dict = predict_gender_imdb(movie, alignment_fn=in_align, assignment_fn=soft_backtrack)
     ssa_pred_dict = predict_gender_ssa(ssa_dict, movie, mode='hard', check_decade=True)
     pred_dict = merge_dict(ssa_pred_dict, imdb_pred_dict, ssa_trump)
-    ordered_snames = sorted(list(pred_dict.keys()))
-    gold_labels = []
-    pred_labels = []
-    for sname in ordered_snames:
-        if sname in gold_dict:
-            if pred_dict[sname] == 'M' or pred_dict[sname] == 'F':
-                gold_labels.append(gold_dict[sname][0])
-                pred_labels.append(pred_dict[sname])
-    if len(gold_labels) == 0:   # could not predict genders for any characters
-        return None, 0
-    acc = accuracy_score(gold_labels, pred_labels)
-    return acc, len(gold_labels)
+    return _acc_for_pred_dict(gold_dict, pred_dict)
 
-def test_hybrid_acc_for_all_labeled_movies(data, ssa_trump):
+def test_hybrid_acc_for_all_labeled_movies(data, ssa_trump, workers=None, gold_labels=None):
     ssa_dict = make_ssa_dict()
     print('HYBRID ACCURACY TEST: ssa_trump = {}'.format(ssa_trump))
-    accs = []
-    total_num_covered = 0
-    total_num_chars = 0
-    for fn in os.listdir(PATH_TO_GOLD_LABELS):
-        if fn.endswith(' ALIGNED.txt') or fn.endswith(' GENDERED.txt'):
-            if fn.endswith(' ALIGNED.txt'):
-                gold_dict = parse_annotated_alignment_file(fn)
-                title = fn.split(' ALIGNED.txt', 1)[0].replace('_', '\'')
-            else:
-                gold_dict = parse_annotated_gendered_file(fn)
-                title = fn.split(' GENDERED.txt', 1)[0].replace('_', '\'')
-            num_chars = len(gold_dict)
-            total_num_chars += num_chars
-            movie = data.get_movie(title)
-            assert(movie is not None)
-            acc, num_covered = _test_hybrid_acc_for_movie(gold_dict, movie, ssa_dict, ssa_trump)
-            if acc is None:
-                if VERBOSE:
-                    print('Movie: {}. Could not make successful gender alignments.'.format(title))
-            else:
-                if VERBOSE:
-                    print('Movie: {}. Accuracy: {} ({} out of {} characters)'.format(title, round(acc, 4), num_covered, num_chars))
-                accs.append(acc)
-                total_num_covered += num_covered
-    print('Average accuracy: {}. Characters covered: {} / {}%'.format(round(np.mean(accs), 4),
-                                                                     total_num_covered,
-                                                                     round(total_num_covered/total_num_chars * 100, 2)))
-    print('----------------------------')
+    movie_fn = partial(_test_hybrid_acc_for_movie, ssa_dict=ssa_dict, ssa_trump=ssa_trump)
+    _print_acc_results(_run_acc_test(data, movie_fn, workers, gold_labels))
 
 if __name__ == "__main__":
     data = DataLoader(verbose=False)
-    test_ssa_acc_for_all_labeled_movies(data, mode='soft', check_decade='False')
-    test_ssa_acc_for_all_labeled_movies(data, mode='soft', check_decade='True')
-    test_ssa_acc_for_all_labeled_movies(data, mode='hard', check_decade='False')
-    test_ssa_acc_for_all_labeled_movies(data, mode='hard', check_decade='True')
-    test_assignment_acc_for_all_labeled_movies(data, in_align, soft_backtrack)
-    test_assignment_acc_for_all_labeled_movies(data, threshold_align, soft_backtrack)
-    test_assignment_acc_for_all_labeled_movies(data, blended_align, soft_backtrack)
-    test_assignment_acc_for_all_labeled_movies(data, in_align, hard_backtrack)
-    test_assignment_acc_for_all_labeled_movies(data, threshold_align, hard_backtrack)
-    test_assignment_acc_for_all_labeled_movies(data, blended_align, hard_backtrack)
-    test_hybrid_acc_for_all_labeled_movies(data, ssa_trump=True)
-    test_hybrid_acc_for_all_labeled_movies(data, ssa_trump=False)
-
-
+    workers = os.cpu_count()
+    test_ssa_acc_for_all_labeled_movies(data, mode='soft', check_decade='False', workers=workers)
+    test_ssa_acc_for_all_labeled_movies(data, mode='soft', check_decade='True', workers=workers)
+    test_ssa_acc_for_all_labeled_movies(data, mode='hard', check_decade='False', workers=workers)
+    test_ssa_acc_for_all_labeled_movies(data, mode='hard', check_decade='True', workers=workers)
+    test_assignment_acc_for_all_labeled_movies(data, in_align, soft_backtrack, workers=workers)
+    test_assignment_acc_for_all_labeled_movies(data, threshold_align, soft_backtrack, workers=workers)
+    test_assignment_acc_for_all_labeled_movies(data, blended_align, soft_backtrack, workers=workers)
+    test_assignment_acc_for_all_labeled_movies(data, in_align, hard_backtrack, workers=workers)
+    test_assignment_acc_for_all_labeled_movies(data, threshold_align, hard_backtrack, workers=workers)
+    test_assignment_acc_for_all_labeled_movies(data, blended_align, hard_backtrack, workers=workers)
+    test_hybrid_acc_for_all_labeled_movies(data, ssa_trump=True, workers=workers)
+    test_hybrid_acc_for_all_labeled_movies(data, ssa_trump=False, workers=workers)
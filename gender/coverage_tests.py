@@ -2,7 +2,10 @@ __author__ = 'Kara Schechtman <kws2121@columbia.edu>, Serina Chang <sc3003@colum
 __date__ = 'Jan 20, 2019'
 
 from data_loader import DataLoader
+from functools import partial
 from imdb_matching import *
+import os
+from parallel_eval import map_ordered
 from ssa_matching import *
 
 """Testing coverage over the entire dataset."""
@@ -12,14 +15,19 @@ def _test_alignment_coverage(movie, alignment_fn):
     Helper for test_all_alignment_coverage to count matches
     in an individual script.
     """
-    inames = [c.lower() for c in movie.imdb_cast]
+    return _count_alignment_coverage(movie, align_characters(movie, alignment_fn))
+
+def _count_alignment_coverage(movie, script_to_imdb):
+    """
+    Counts matches in an individual script given its alignments.
+    """
     chars_matched = 0
     chars_missed = 0
     lines_matched = 0
     lines_missed = 0
 
     for character in movie.characters.values():
-        if any([alignment_fn(iname, character.name) for iname in inames]):
+        if character.name in script_to_imdb:
             chars_matched += 1
             lines_matched += len(character.line_data)
         else:
@@ -28,7 +36,7 @@ def _test_alignment_coverage(movie, alignment_fn):
 
     return chars_matched, chars_missed, lines_matched, lines_missed
 
-def test_all_alignment_coverage(data, alignment_fn):
+def test_all_alignment_coverage(data, alignment_fn, workers=None):
     """
     Checks coverage for an alignment function.
     Provides two statistics:
@@ -36,14 +44,16 @@ def test_all_alignment_coverage(data, alignment_fn):
     alignment if it matches at least one IMDB name.
     2. Lines with alignments - a line is covered by alignment
     if it is spoken by a character with an aligned name.
+    If workers is greater than 1, movies are processed on a pool
+    of that many processes; the totals do not depend on it.
     """
     total_chars_matched = 0
     total_lines_matched = 0
     total_chars_missed = 0
     total_lines_missed = 0
-    for movie in data.movies.values():
-        chars_matched, chars_missed, lines_matched, lines_missed = (
-                    _test_alignment_coverage(movie, alignment_fn))
+    movie_counts = map_ordered(partial(_test_alignment_coverage, alignment_fn=alignment_fn),
+                               [(movie,) for movie in data.movies.values()], workers)
+    for chars_matched, chars_missed, lines_matched, lines_missed in movie_counts:
         total_chars_matched += chars_matched
         total_chars_missed += chars_missed
         total_lines_matched += lines_matched
@@ -70,6 +80,15 @@ def _test_assignment_coverage(movie, alignment_fn, assignment_fn):
     Helper for test_all_assignment_coverage to count matches
     in an individual script.
     """
+    script_to_imdb = align_characters(movie, alignment_fn)
+    assignment = assignment_fn(copy_alignments(script_to_imdb))
+    return _count_assignment_coverage(movie, script_to_imdb, assignment)
+
+def _count_assignment_coverage(movie, script_to_imdb, assignment):
+    """
+    Counts matches in an individual script given its alignments and
+    the assignment made from them.
+    """
     success = 0
     failure = 0
     chars_matched = 0
@@ -79,14 +98,9 @@ def _test_assignment_coverage(movie, alignment_fn, assignment_fn):
     chars_gendered = 0
 
     inames = movie.imdb_cast
-    script_to_imdb = defaultdict(list)
     aligned_char_count = 0
     aligned_line_count = 0
-    # Align script characters to possible IMDb characters.
     for character in movie.characters.values():
-        for iname in inames:
-            if alignment_fn(iname, character.name):
-                script_to_imdb[character.name].append(iname)
         if character.name not in script_to_imdb.keys():
             chars_missed += 1 # Record lines and character as unmatched.
             lines_missed += len(character.line_data)
@@ -95,7 +109,6 @@ def _test_assignment_coverage(movie, alignment_fn, assignment_fn):
             aligned_char_count += 1
 
     # Check final assignments and calculate final numbers.
-    assignment = assignment_fn(script_to_imdb)
     if assignment:
         for sname in assignment:
             gender = inames[assignment[sname]][1]
@@ -113,7 +126,7 @@ def _test_assignment_coverage(movie, alignment_fn, assignment_fn):
     return success, failure, chars_matched, chars_missed, \
            lines_matched, lines_missed, chars_gendered
 
-def test_all_assignment_coverage(data, alignment_fn, assignment_fn):
+def test_all_assignment_coverage(data, alignment_fn, assignment_fn, workers=None):
     """
     Tests coverage of assignments from alignments.
     Provides four statistics:
@@ -128,6 +141,8 @@ def test_all_assignment_coverage(data, alignment_fn, assignment_fn):
     by characters with an IMDB match.
     4. Number of characters successfully gendered - characters
     with an IMDb match that has a gender.
+    If workers is greater than 1, movies are processed on a pool
+    of that many processes; the totals do not depend on it.
     """
     total_success = 0
     total_failure = 0
@@ -137,9 +152,9 @@ def test_all_assignment_coverage(data, alignment_fn, assignment_fn):
     total_lines_missed = 0
     total_chars_gendered = 0
 
-    for movie in data.movies.values():
-        success, failure, chars_matched, chars_missed, lines_matched, lines_missed, chars_gendered = (
-                    _test_assignment_coverage(movie, alignment_fn, assignment_fn))
+    movie_counts = map_ordered(partial(_test_assignment_coverage, alignment_fn=alignment_fn, assignment_fn=assignment_fn),
+                               [(movie,) for movie in data.movies.values()], workers)
+    for success, failure, chars_matched, chars_missed, lines_matched, lines_missed, chars_gendered in movie_counts:
         total_success += success
         total_failure += failure
         total_chars_matched += chars_matched
@@ -183,11 +198,17 @@ def _test_ssa_coverage(movie, ssa_dict, mode, check_decade):
     Helper for test_all_ssa_coverage to count coverage
     in an individual script.
     """
+    gender_alignments = predict_gender_ssa(ssa_dict, movie, mode, check_decade)
+    return _count_prediction_coverage(movie, gender_alignments)
+
+def _count_prediction_coverage(movie, gender_alignments):
+    """
+    Counts coverage in an individual script given its predictions.
+    """
     chars_matched = 0
     chars_missed = 0
     lines_matched = 0
     lines_missed = 0
-    gender_alignments = predict_gender_ssa(ssa_dict, movie, mode, check_decade)
     for sname, gen in gender_alignments.items():
         character = movie.get_character(sname)
         if gen == 'M' or gen == 'F':
@@ -198,7 +219,7 @@ def _test_ssa_coverage(movie, ssa_dict, mode, check_decade):
             lines_missed += len(character.line_data)
     return chars_matched, chars_missed, lines_matched, lines_missed
 
-def test_all_ssa_coverage(data, mode, check_decade):
+def test_all_ssa_coverage(data, mode, check_decade, workers=None):
     """
     Checks coverage for the SSA gender prediction function.
     Provides two statistics:
@@ -206,15 +227,17 @@ def test_all_ssa_coverage(data, mode, check_decade):
     if its gender can be predicted.
     2. Lines covered - a line is covered if it is spoken
     by a character whose gender can be predicted.
+    If workers is greater than 1, movies are processed on a pool
+    of that many processes; the totals do not depend on it.
     """
     ssa_dict = make_ssa_dict()
     total_chars_matched = 0
     total_lines_matched = 0
     total_chars_missed = 0
     total_lines_missed = 0
-    for movie in data.movies.values():
-        chars_matched, chars_missed, lines_matched, lines_missed = \
-            _test_ssa_coverage(movie, ssa_dict, mode, check_decade)
+    movie_counts = map_ordered(partial(_test_ssa_coverage, ssa_dict=ssa_dict, mode=mode, check_decade=check_decade),
+                               [(movie,) for movie in data.movies.values()], workers)
+    for chars_matched, chars_missed, lines_matched, lines_missed in movie_counts:
         total_chars_matched += chars_matched
         total_chars_missed += chars_missed
         total_lines_matched += lines_matched
@@ -240,19 +263,17 @@ def test_all_ssa_coverage(data, mode, check_decade):
 
 if __name__ == "__main__":
     data = DataLoader(verbose=False)
-    test_all_ssa_coverage(data, mode='soft', check_decade=False)
-    test_all_ssa_coverage(data, mode ='soft', check_decade=True)
-    test_all_ssa_coverage(data, mode='hard', check_decade=False)
-    test_all_ssa_coverage(data, mode='hard', check_decade=True)
-    test_all_alignment_coverage(data, in_align)
-    test_all_alignment_coverage(data, threshold_align)
-    test_all_alignment_coverage(data, blended_align)
-    test_all_assignment_coverage(data, in_align, soft_backtrack)
-    test_all_assignment_coverage(data, threshold_align, soft_backtrack)
-    test_all_assignment_coverage(data, blended_align, soft_backtrack)
-    test_all_assignment_coverage(data, in_align, hard_backtrack)
-    test_all_assignment_coverage(data, threshold_align, hard_backtrack)
-    test_all_assignment_coverage(data, blended_align, hard_backtrack)
-
-
-
+    workers = os.cpu_count()
+    test_all_ssa_coverage(data, mode='soft', check_decade=False, workers=workers)
+    test_all_ssa_coverage(data, mode ='soft', check_decade=True, workers=workers)
+    test_all_ssa_coverage(data, mode='hard', check_decade=False, workers=workers)
+    test_all_ssa_coverage(data, mode='hard', check_decade=True, workers=workers)
+    test_all_alignment_coverage(data, in_align, workers=workers)
+    test_all_alignment_coverage(data, threshold_align, workers=workers)
+    test_all_alignment_coverage(data, blended_align, workers=workers)
+    test_all_assignment_coverage(data, in_align, soft_backtrack, workers=workers)
+    test_all_assignment_coverage(data, threshold_align, soft_backtrack, workers=workers)
+    test_all_assignment_coverage(data, blended_align, soft_backtrack, workers=workers)
+    test_all_assignment_coverage(data, in_align, hard_backtrack, workers=workers)
+    test_all_assignment_coverage(data, threshold_align, hard_backtrack, workers=workers)
+    test_all_assignment_coverage(data, blended_align, hard_backtrack, workers=workers)
@@ -0,0 +1,151 @@
+__author__ = 'Kara Schechtman <kws2121@columbia.edu>, Serina Chang <sc3003@columbia.edu>'
+__date__ = 'Oct 19, 2026'
+
+from accuracy_tests import *
+from accuracy_tests import _acc_for_pred_dict
+from coverage_tests import _count_alignment_coverage, _count_assignment_coverage, _count_prediction_coverage
+from data_loader import DataLoader
+from functools import partial
+from imdb_matching import *
+import itertools
+from parallel_eval import map_ordered
+from ssa_matching import *
+
+"""Coverage and accuracy of every prediction configuration in one pass over the dataset."""
+
+ALIGNMENT_FNS = [in_align, threshold_align, blended_align]
+ASSIGNMENT_FNS = [soft_backtrack, hard_backtrack]
+MODES = ['soft', 'hard']
+CHECK_DECADES = [False, True]
+SSA_TRUMPS = [True, False]
+
+# ----------------------- GENERAL UTILITIES -----------------------
+def _fn_names(config):
+    return tuple([c.__name__ if callable(c) else c for c in config])
+
+# ----------------------- EVALUATION -----------------------
+def _evaluate_movie(movie, gold_dict, ssa_dict, alignment_fns, assignment_fns,
+                    modes, check_decades, ssa_trumps):
+    """
+    Evaluates every configuration on one movie. Alignments, assignments and
+    SSA scores are computed once and shared by all configurations that use
+    them. Returns a dictionary from (test, configuration) to the counts of
+    the coverage helpers or, for accuracy tests on labeled movies, to a
+    ConfusionMatrix.
+    """
+    results = {}
+
+    imdb_preds = {}
+    for alignment_fn in alignment_fns:
+        script_to_imdb = align_characters(movie, alignment_fn)
+        results[('alignment_cov', (alignment_fn,))] = _count_alignment_coverage(movie, script_to_imdb)
+        for assignment_fn in assignment_fns:
+            assignment = assignment_fn(copy_alignments(script_to_imdb))
+            config = (alignment_fn, assignment_fn)
+            results[('assignment_cov', config)] = _count_assignment_coverage(movie, script_to_imdb, assignment)
+            imdb_preds[config] = assignment_to_genders(movie, assignment)
+
+    ssa_preds = {}
+    for check_decade in check_decades:
+        name_scores = score_movie_ssa(ssa_dict, movie, check_decade)
+        for mode in modes:
+            config = (mode, check_decade)
+            ssa_preds[config] = categorize_ssa_scores(name_scores, mode)
+            results[('ssa_cov', config)] = _count_prediction_coverage(movie, ssa_preds[config])
+
+    hybrid_preds = {}
+    for imdb_config, ssa_config, ssa_trump in itertools.product(imdb_preds, ssa_preds, ssa_trumps):
+        config = imdb_config + ssa_config + (ssa_trump,)
+        hybrid_preds[config] = merge_dict(ssa_preds[ssa_config], imdb_preds[imdb_config], ssa_trump)
+        results[('hybrid_cov', config)] = _count_prediction_coverage(movie, hybrid_preds[config])
+
+    if gold_dict is not None:
+        for test, preds in [('imdb_acc', imdb_preds), ('ssa_acc', ssa_preds), ('hybrid_acc', hybrid_preds)]:
+            for config, pred_dict in preds.items():
+                results[(test, config)] = _acc_for_pred_dict(gold_dict, pred_dict)
+    return results
+
+def _reduce_results(movie_results, movie_num_labeled):
+    """
+    Adds up the per-movie results of _evaluate_movie, in order.
+    Coverage counts are summed; confusion matrices are added to an
+    AccuracyAccumulator per configuration.
+    """
+    totals = {}
+    for results, num_labeled in zip(movie_results, movie_num_labeled):
+        for key, value in results.items():
+            if key[0].endswith('_cov'):
+                if key not in totals:
+                    totals[key] = [0] * len(value)
+                for i, count in enumerate(value):
+                    totals[key][i] += count
+            else:
+                if key not in totals:
+                    totals[key] = AccuracyAccumulator()
+                totals[key].add_movie(value, num_labeled)
+    return totals
+
+def run_evaluation_grid(data, alignment_fns=ALIGNMENT_FNS, assignment_fns=ASSIGNMENT_FNS,
+                        modes=MODES, check_decades=CHECK_DECADES, ssa_trumps=SSA_TRUMPS,
+                        ssa_dict=None, gold_labels=None, workers=None):
+    """
+    Primary function. Evaluates the coverage (over the whole dataset) and the
+    accuracy (over the labeled movies) of every combination of the given
+    alignment functions, assignment functions, SSA modes, check_decade values
+    and ssa_trumps values in a single pass, loading the SSA data and gold
+    labels once. If workers is greater than 1, movies are evaluated on a pool
+    of that many processes, with the same totals. Returns the totals keyed
+    by (test, configuration).
+    """
+    if ssa_dict is None:
+        ssa_dict = make_ssa_dict()
+    if gold_labels is None:
+        gold_labels = get_gold_label_store()
+    gold_labels.labeled_movies(data)  # checks that every labeled movie is loaded
+    evaluate_fn = partial(_evaluate_movie, ssa_dict=ssa_dict, alignment_fns=alignment_fns,
+                          assignment_fns=assignment_fns, modes=modes,
+                          check_decades=check_decades, ssa_trumps=ssa_trumps)
+    movies = list(data.movies.values())
+    movie_results = map_ordered(evaluate_fn, [(movie, gold_labels.by_title.get(movie.title))
+                                              for movie in movies], workers)
+    movie_num_labeled = [len(gold_labels.by_title.get(movie.title, ())) for movie in movies]
+    return _reduce_results(movie_results, movie_num_labeled)
+
+def print_evaluation_grid(totals):
+    """
+    Prints the totals of run_evaluation_grid as one table row per configuration.
+    """
+    def pct(part, whole):
+        return round(part/whole * 100, 2) if whole else 0.0
+
+    print('COVERAGE')
+    for (test, config), counts in sorted(totals.items(), key=lambda x: (x[0][0], _fn_names(x[0][1]))):
+        name = ', '.join([str(c) for c in _fn_names(config)])
+        if test == 'assignment_cov':
+            success, failure, chars_matched, chars_missed, lines_matched, lines_missed, chars_gendered = counts
+            total_chars = chars_matched + chars_missed
+            print('{:<15} {:<55} files assigned: {} / {}%  chars matched: {} / {}%  lines matched: {} / {}%  chars gendered: {} / {}%'.format(
+                  test, name, success, pct(success, success + failure),
+                  chars_matched, pct(chars_matched, total_chars),
+                  lines_matched, pct(lines_matched, lines_matched + lines_missed),
+                  chars_gendered, pct(chars_gendered, total_chars)))
+        elif test.endswith('_cov'):
+            chars_matched, chars_missed, lines_matched, lines_missed = counts
+            print('{:<15} {:<55} chars covered: {} / {}%  lines covered: {} / {}%'.format(
+                  test, name, chars_matched, pct(chars_matched, chars_matched + chars_missed),
+                  lines_matched, pct(lines_matched, lines_matched + lines_missed)))
+    print('----------------------------')
+
+    print('ACCURACY')
+    for (test, config), results in sorted(totals.items(), key=lambda x: (x[0][0], _fn_names(x[0][1]))):
+        if test.endswith('_acc'):
+            name = ', '.join([str(c) for c in _fn_names(config)])
+            micro = results.micro_accuracy()
+            print('{:<15} {:<55} average accuracy: {}  micro accuracy: {}  chars covered: {} / {}%'.format(
+                  test, name, round(results.macro_accuracy(), 4), None if micro is None else round(micro, 4),
+                  results.num_covered(), pct(results.num_covered(), results.num_labeled)))
+    print('----------------------------')
+
+if __name__ == "__main__":
+    data = DataLoader(verbose=False)
+    print_evaluation_grid(run_evaluation_grid(data, workers=os.cpu_count()))
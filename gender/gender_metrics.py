@@ -0,0 +1,144 @@
+__author__ = 'Kara Schechtman <kws2121@columbia.edu>, Serina Chang <sc3003@columbia.edu>'
+__date__ = 'Oct 19, 2026'
+
+import math
+
+"""Confusion matrices and accuracy metrics for gender predictions."""
+
+GENDERS = ['UNK', 'F', 'M', 'BOTH']
+OTHER_IDX = len(GENDERS)  # labels that gender_to_idx does not know
+
+def gender_to_idx(gender):
+    if gender == 'UNK':
+        return 0
+    if gender == 'F':
+        return 1
+    if gender == 'M':
+        return 2
+    if gender == 'BOTH':
+        return 3
+    return -1
+
+def _matrix_idx(gender):
+    idx = gender_to_idx(gender)
+    return OTHER_IDX if idx == -1 else idx
+
+class ConfusionMatrix(object):
+    """
+    Counts (gold label, predicted label) pairs, indexed by gender_to_idx,
+    with one extra row and column for any other label. Matrices can be
+    merged, e.g. to add up the results of parallel workers.
+    """
+    def __init__(self):
+        self.counts = [[0] * (OTHER_IDX + 1) for _ in range(OTHER_IDX + 1)]
+
+    def add(self, gold, pred):
+        self.counts[_matrix_idx(gold)][_matrix_idx(pred)] += 1
+
+    def merge(self, other):
+        for i, row in enumerate(other.counts):
+            for j, count in enumerate(row):
+                self.counts[i][j] += count
+
+    def total(self):
+        return sum([sum(row) for row in self.counts])
+
+    def correct(self):
+        # Only known labels can match; two unknown labels may be different.
+        return sum([self.counts[i][i] for i in range(OTHER_IDX)])
+
+    def accuracy(self):
+        """
+        Returns the share of predictions that match the gold label,
+        or None if there are none.
+        """
+        total = self.total()
+        if total == 0:
+            return None
+        return self.correct() / total
+
+    def precision(self, gender):
+        """
+        Returns the share of predictions of a gender that are correct,
+        or None if that gender was never predicted.
+        """
+        idx = _matrix_idx(gender)
+        predicted = sum([row[idx] for row in self.counts])
+        if predicted == 0:
+            return None
+        return self.counts[idx][idx] / predicted
+
+    def recall(self, gender):
+        """
+        Returns the share of gold labels of a gender that are predicted
+        correctly, among the characters that were predicted at all, or
+        None if there are none.
+        """
+        idx = _matrix_idx(gender)
+        labeled = sum(self.counts[idx])
+        if labeled == 0:
+            return None
+        return self.counts[idx][idx] / labeled
+
+class AccuracyAccumulator(object):
+    """
+    Adds up per-movie confusion matrices. Keeps the combined matrix for
+    micro-averaged metrics and each movie's matrix, in the order the
+    movies were added, for the macro averages. num_labeled counts every
+    gold-labeled character, predicted or not, for coverage.
+    """
+    def __init__(self):
+        self.matrix = ConfusionMatrix()
+        self.movie_matrices = []
+        self.num_labeled = 0
+
+    def add_movie(self, matrix, num_labeled):
+        self.num_labeled += num_labeled
+        if matrix.total() > 0:  # movies without predictions are left out of the averages
+            self.movie_matrices.append(matrix)
+            self.matrix.merge(matrix)
+
+    def merge(self, other):
+        """
+        Adds another accumulator's results after this one's.
+        """
+        self.matrix.merge(other.matrix)
+        self.movie_matrices.extend(other.movie_matrices)
+        self.num_labeled += other.num_labeled
+
+    def num_covered(self):
+        return self.matrix.total()
+
+    def coverage(self):
+        if self.num_labeled == 0:
+            return None
+        return self.num_covered() / self.num_labeled
+
+    def micro_accuracy(self):
+        return self.matrix.accuracy()
+
+    def macro_accuracy(self):
+        if not self.movie_matrices:
+            return float('nan')
+        return math.fsum([m.accuracy() for m in self.movie_matrices]) / len(self.movie_matrices)
+
+    def macro_precision(self, gender):
+        """
+        Returns the average over movies of the precision for a gender,
+        leaving out movies that never predicted it, or None if none did.
+        """
+        return _mean([m.precision(gender) for m in self.movie_matrices])
+
+    def macro_recall(self, gender):
+        """
+        Returns the average over movies of the recall for a gender,
+        leaving out movies with no predicted character of it, or None if
+        there are none.
+        """
+        return _mean([m.recall(gender) for m in self.movie_matrices])
+
+def _mean(values):
+    values = [v for v in values if v is not None]
+    if not values:
+        return None
+    return math.fsum(values) / len(values)
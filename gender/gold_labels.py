@@ -0,0 +1,133 @@
+__author__ = 'Kara Schechtman <kws2121@columbia.edu>, Serina Chang <sc3003@columbia.edu>'
+__date__ = 'Oct 19, 2026'
+
+import os
+import pickle
+from preprocessing.file_utils import atomic_write
+
+"""Parsing and caching the hand-labeled gold label files."""
+
+PATH_TO_GOLD_LABELS = './data/gold_labels/'
+PATH_TO_GOLD_CACHE = './data/cache/gold_labels.pkl'
+ALIGNED_SUFFIX = ' ALIGNED.txt'
+GENDERED_SUFFIX = ' GENDERED.txt'
+
+# ----------------------- PARSING -----------------------
+def parse_annotated_alignment_file(filename, path=PATH_TO_GOLD_LABELS):
+    with open(os.path.join(path, filename), 'r') as f:
+        char_dict = {}
+        for line in f.readlines():
+            sname_gen, alignment = line.split(' -> ', 1)
+            sname, gen = sname_gen.split(' (', 1)
+            gen = gen.rstrip(')')
+            alignment = alignment.strip()
+            if alignment.startswith('POSSIBILITIES '):
+                certain = False
+                inames = alignment.strip('POSSIBILITIES ').split(', ')
+            elif alignment == 'N/A':
+                certain = True
+                inames = None
+            elif ', ' in alignment:
+                certain = True
+                inames = alignment.split(', ')
+            else:
+                certain = True
+                inames = alignment
+            char_dict[sname] = (gen, inames, certain)
+        return char_dict
+
+def parse_annotated_gendered_file(filename, path=PATH_TO_GOLD_LABELS):
+    with open(os.path.join(path, filename), 'r') as f:
+        char_dict = {}
+        for line in f.readlines():
+            sname, gen = line.strip().split(' (', 1)
+            gen = gen.rstrip(')')
+            char_dict[sname] = gen
+        return char_dict
+
+def filename_to_title(filename):
+    """
+    Recovers the movie title from a gold label file name, in which
+    apostrophes are written as underscores.
+    """
+    for suffix in [ALIGNED_SUFFIX, GENDERED_SUFFIX]:
+        if filename.endswith(suffix):
+            return filename.split(suffix, 1)[0].replace('_', '\'')
+    return None
+
+# ----------------------- STORE -----------------------
+class GoldLabelStore(object):
+    """
+    Holds every gold label file, parsed once. entries lists (title, gold
+    labels) pairs in directory order and by_title indexes them by title,
+    the only key the files carry; labeled_movies pairs them with movies.
+    The parsed labels are cached on disk and reused for as long as no gold
+    label file is added, removed or modified.
+    """
+    def __init__(self, path=PATH_TO_GOLD_LABELS, cache_fn=PATH_TO_GOLD_CACHE):
+        signature = _directory_signature(path)
+        self.entries = _load_cache(cache_fn, signature)
+        if self.entries is None:
+            self.entries = []
+            for fn in os.listdir(path):
+                if fn.endswith(ALIGNED_SUFFIX):
+                    self.entries.append((filename_to_title(fn), parse_annotated_alignment_file(fn, path)))
+                elif fn.endswith(GENDERED_SUFFIX):
+                    self.entries.append((filename_to_title(fn), parse_annotated_gendered_file(fn, path)))
+            if cache_fn is not None:
+                _save_cache(cache_fn, signature, self.entries)
+        self.by_title = dict(self.entries)
+
+    def labeled_movies(self, data):
+        """
+        Matches the gold labels to the movies of a DataLoader. Returns a list
+        of (title, gold labels, movie) tuples in directory order.
+        """
+        labeled_movies = []
+        for title, gold_dict in self.entries:
+            movie = data.get_movie(title)
+            assert(movie is not None)
+            labeled_movies.append((title, gold_dict, movie))
+        return labeled_movies
+
+    def num_labeled_chars(self):
+        return sum([len(gold_dict) for title, gold_dict in self.entries])
+
+_default_store = None
+
+def get_gold_label_store():
+    """
+    Returns the GoldLabelStore for the default gold label directory,
+    loading it the first time it is needed in this process.
+    """
+    global _default_store
+    if _default_store is None:
+        _default_store = GoldLabelStore()
+    return _default_store
+
+def _directory_signature(path):
+    """
+    Names, sizes and modification times of the gold label files.
+    """
+    signature = []
+    for fn in sorted(os.listdir(path)):
+        if fn.endswith(ALIGNED_SUFFIX) or fn.endswith(GENDERED_SUFFIX):
+            stat = os.stat(os.path.join(path, fn))
+            signature.append((fn, stat.st_size, stat.st_mtime_ns))
+    return signature
+
+def _load_cache(cache_fn, signature):
+    if cache_fn is None or not os.path.exists(cache_fn):
+        return None
+    try:
+        with open(cache_fn, 'rb') as f:
+            cached = pickle.load(f)
+    except (pickle.UnpicklingError, EOFError, ValueError):
+        return None
+    if cached.get('signature') != signature:
+        return None
+    return cached['entries']
+
+def _save_cache(cache_fn, signature, entries):
+    with atomic_write(cache_fn, 'wb', sync=False) as f:
+        pickle.dump({'signature': signature, 'entries': entries}, f)
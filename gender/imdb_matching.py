@@ -4,6 +4,7 @@ __date__ = 'Jan 20, 2019'
 from character import Character
 from collections import defaultdict
 import difflib
+from tracing import span
 
 '''Predict a movie's cast's gender labels from IMDb.'''
 
@@ -164,24 +165,156 @@ def soft_backtrack(script_to_imdb):
         return False
 
 # ---------------------------- PREDICT ----------------------------
-def predict_gender_imdb(movie, alignment_fn, assignment_fn):
+def align_characters(movie, alignment_fn):
+    """
+    Aligns every script character to its potential IMDb characters.
+    Returns a dictionary from character names to lists of IMDb names,
+    in character and cast order; unaligned characters are left out.
+    Assignment functions may modify the dictionary, so pass a copy
+    (see copy_alignments) when it is used more than once.
+    """
+    script_to_imdb = defaultdict(list)
+    with span('align', movie=movie.title, alignment=alignment_fn.__name__,
+              candidate_pairs=len(movie.characters) * len(movie.imdb_cast or ())):
+        for character in movie.characters:
+            for iname in movie.imdb_cast:
+                if alignment_fn(iname, character):
+                    script_to_imdb[character].append(iname)
+    return script_to_imdb
+
+def copy_alignments(script_to_imdb):
+    """
+    Copies the result of align_characters, including the lists.
+    """
+    copied = defaultdict(list)
+    for sname, inames in script_to_imdb.items():
+        copied[sname] = list(inames)
+    return copied
+
+def assignment_to_genders(movie, assignment):
+    """
+    Looks up the gender of the IMDb character assigned to each
+    script character, keeping only male and female ones.
+    """
+    gender_alignments = {}
+    if assignment:
+        for sname in assignment:
+            gender = movie.imdb_cast[assignment[sname]][1]
+            if gender == 'M' or gender == 'F':
+                gender_alignments[sname] = gender
+    return gender_alignments
+
+def imdb_config(alignment_fn, assignment_fn):
+    """
+    The settings that IMDb predictions depend on, used as a cache key.
+    """
+    return {'alignment_fn': alignment_fn, 'assignment_fn': assignment_fn}
+
+def predict_gender_imdb(movie, alignment_fn, assignment_fn, cache=None):
     """
     Given a movie, a function to align IMDB data to the characters,
     and a function to choose from potential aligned names, predict
     the gender of characters. Returns a dictionary from character
-    names to predicted genders.
+    names to predicted genders. If a PredictionCache is given, it is
+    consulted first.
     """
-    script_to_imdb = defaultdict(list)
-    for character in movie.characters:
-        for iname in movie.imdb_cast:
-            if alignment_fn(iname, character):
-                script_to_imdb[character].append(iname)
+    if cache is not None:
+        config = imdb_config(alignment_fn, assignment_fn)
+        cached = cache.get(movie, 'imdb', config)
+        if cached is not None:
+            return cached
+    script_to_imdb = align_characters(movie, alignment_fn)
 
     # Match genders.
-    assignment = assignment_fn(script_to_imdb)
+    with span('assign', movie=movie.title, assignment=assignment_fn.__name__, aligned_chars=len(script_to_imdb)):
+        assignment = assignment_fn(script_to_imdb)
+    gender_alignments = assignment_to_genders(movie, assignment)
+    if cache is not None:
+        cache.put(movie, 'imdb', config, gender_alignments)
+    return gender_alignments
+
+# Assignment functions whose choice for a script character only depends on
+# the characters it shares IMDb candidates with (its connected component).
+# Characters outside such a component can be left out without changing
+# the assignments inside it. hard_backtrack is not one of them, since a
+# failure anywhere makes the whole assignment fail. Matched by identity,
+# so any other function, including a wrapped one, gets no skipping.
+COMPONENT_LOCAL_ASSIGNMENTS = (baseline_assign, soft_backtrack)
+
+def predict_gender_imdb_staged(movie, alignment_fn, assignment_fn, resolved, stats=None):
+    """
+    Predicts genders from IMDb for the characters that are not in resolved,
+    e.g. those already gendered by SSA, giving the same predictions for them
+    as predict_gender_imdb. Only unresolved characters, plus resolved
+    characters that compete with them for the same IMDb names, are aligned
+    against the full cast and sent into assignment; other resolved characters
+    are only checked against the names the unresolved ones could claim.
+    If a stats dictionary is given, the number of alignment calls made
+    ('alignments') and that predict_gender_imdb would make
+    ('full_alignments'), and the number of characters assigned
+    ('assigned') are added to it.
+    """
+    inames = list(movie.imdb_cast) if movie.imdb_cast else []
+    snames = list(movie.characters)
+    if assignment_fn in COMPONENT_LOCAL_ASSIGNMENTS:
+        skippable = resolved
+    else:
+        skippable = set()
+    num_alignments = 0
+    align_span = span('align_staged', movie=movie.title, alignment=alignment_fn.__name__)
+    with align_span:
+        # Align unresolved characters against the whole cast.
+        aligned = {}  # sname mapped to the set of inames it aligns to
+        claimable = set()
+        for sname in snames:
+            if sname not in skippable:
+                aligned[sname] = set([iname for iname in inames if alignment_fn(iname, sname)])
+                num_alignments += len(inames)
+                claimable |= aligned[sname]
+
+        # Pull in resolved characters that share a candidate with the component
+        # of an unresolved character, until no more join.
+        if assignment_fn is soft_backtrack:
+            checked = defaultdict(set)  # resolved sname mapped to inames tested
+            changed = True
+            while changed:
+                changed = False
+                for sname in snames:
+                    if sname in aligned:
+                        continue
+                    to_check = claimable - checked[sname]
+                    num_alignments += len(to_check)
+                    checked[sname] |= to_check
+                    shared = set([iname for iname in to_check if alignment_fn(iname, sname)])
+                    if shared:
+                        rest = [iname for iname in inames if iname not in checked[sname]]
+                        num_alignments += len(rest)
+                        aligned[sname] = shared | set([iname for iname in rest if alignment_fn(iname, sname)])
+                        claimable |= aligned[sname]
+                        changed = True
+
+        # Keep the original character and cast order, which the assignment
+        # heuristics use to break ties.
+        script_to_imdb = defaultdict(list)
+        for sname in snames:
+            if sname in aligned:
+                for iname in inames:
+                    if iname in aligned[sname]:
+                        script_to_imdb[sname].append(iname)
+        align_span.set(candidate_pairs=num_alignments, full_candidate_pairs=len(snames) * len(inames))
+
+    if stats is not None:
+        stats['alignments'] = stats.get('alignments', 0) + num_alignments
+        stats['full_alignments'] = stats.get('full_alignments', 0) + len(snames) * len(inames)
+        stats['assigned'] = stats.get('assigned', 0) + len(script_to_imdb)
+
+    with span('assign', movie=movie.title, assignment=assignment_fn.__name__, aligned_chars=len(script_to_imdb)):
+        assignment = assignment_fn(script_to_imdb)
     gender_alignments = {}
     if assignment:
         for sname in assignment:
+            if sname in resolved:
+                continue
             gender = movie.imdb_cast[assignment[sname]][1]
             if gender == 'M' or gender == 'F':
                 gender_alignments[sname] = gender
@@ -0,0 +1,32 @@
+__author__ = 'Kara Schechtman <kws2121@columbia.edu>, Serina Chang <sc3003@columbia.edu>'
+__date__ = 'Oct 19, 2026'
+
+from concurrent.futures import ProcessPoolExecutor
+
+"""Runs per-movie evaluation work on a process pool."""
+
+_worker_fn = None
+
+def _init_worker(fn):
+    global _worker_fn
+    _worker_fn = fn
+
+def _call_worker_fn(args):
+    return _worker_fn(*args)
+
+def map_ordered(fn, arg_tuples, workers=None):
+    """
+    Calls fn(*args) for every tuple in arg_tuples and returns the results
+    in input order, whatever order the workers finish in. Callers add the
+    results up in that order, so the totals are the same as in a serial run
+    for any number of workers. fn is sent to each worker once, so constant
+    arguments such as the SSA dictionary should be bound into it with
+    functools.partial rather than repeated in arg_tuples.
+    With workers set to None or 1, everything runs in this process.
+    """
+    arg_tuples = list(arg_tuples)
+    if not workers or workers == 1 or len(arg_tuples) <= 1:
+        return [fn(*args) for args in arg_tuples]
+    chunksize = max(1, len(arg_tuples) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(fn,)) as executor:
+        return list(executor.map(_call_worker_fn, arg_tuples, chunksize=chunksize))
@@ -1,14 +1,16 @@
 __author__ = 'Serina Chang <sc3003@columbia.edu>'
 __date__ = 'Jan 20, 2019'
 
+import hashlib
+from name_normalization import name_tokens
 import os
+from tracing import span
 
 '''SSA-based and rule-based gender prediction for character names.'''
 
 # ----------------------- GENERAL UTILITIES -----------------------
 def char_name_to_tokens(char_name):
-    char_name = char_name.replace('/', ' ')
-    return char_name.lower().split()
+    return name_tokens(char_name)  # memoized, as a tuple
 
 # --------------------- RULE-BASED PREDICTION ---------------------
 FEMALE_TERMS = {'ms', 'miss', 'mrs', 'mother', 'mom', 'momma', 'sister',
@@ -41,20 +43,33 @@ HARD_M_CUTOFF = .1
 SOFT_F_CUTOFF = .5
 SOFT_M_CUTOFF = .5
 
-def make_ssa_dict():
+def make_ssa_dict(path=PATH_TO_SSA):
     """
     Makes a dictionary of year mapped to SSA name_scores.
     """
     year_to_names = {}
-    for fn in os.listdir(PATH_TO_SSA):
+    for fn in os.listdir(path):
         if fn.startswith('yob'):
             year = fn.rsplit('.txt', 1)[0]
             year = year.split('yob', 1)[1]
             year = int(year)
-            name_scores = get_name_scores(PATH_TO_SSA + fn)
+            name_scores = get_name_scores(os.path.join(path, fn))
             year_to_names[year] = name_scores
     return year_to_names
 
+def ssa_table_version(path=PATH_TO_SSA):
+    """
+    Identifies the current SSA table by the names, sizes and modification
+    times of its files, so cached predictions are invalidated when the
+    table is replaced.
+    """
+    h = hashlib.sha1()
+    for fn in sorted(os.listdir(path)):
+        if fn.startswith('yob'):
+            stat = os.stat(path + fn)
+            h.update('{}:{}:{};'.format(fn, stat.st_size, stat.st_mtime_ns).encode('utf-8'))
+    return h.hexdigest()
+
 def get_name_scores(ssa_fn):
     """
     Makes SSA name_scores, i.e. a dictionary of name mapped to score, where score
@@ -120,32 +135,66 @@ def score_to_category(score, mode):
         return 'M'
     return 'UNK'
 
-def predict_gender_ssa(ssa_dict, movie, mode, check_decade=True):
+def score_movie_ssa(ssa_dict, movie, check_decade=True):
+    """
+    Scores every character in a movie. Returns a dictionary from character
+    names to a list of scores, one per individual name: names joined
+    with ' and ' (e.g. 'thelma and louise') are scored separately.
+    The scores do not depend on the mode, so they can be shared by
+    predictions in both modes.
+    """
+    name_scores = {}
+    year = movie.year
+    with span('score_ssa', movie=movie.title, num_chars=len(movie.characters)):
+        for character in movie.characters.values():
+            sname = character.name
+            if ' and ' in sname:
+                individual_names = sname.split(' and ')
+            else:
+                individual_names = [sname]
+            name_scores[sname] = [score_gender_ssa(ssa_dict, name, movie_year=year, check_decade=check_decade)
+                                  for name in individual_names]
+    return name_scores
+
+def categorize_ssa_scores(name_scores, mode):
+    """
+    Turns the scores from score_movie_ssa into gender predictions. A character
+    is only predicted if all of its individual names are, with the same gender.
+    """
+    gender_alignments = {}
+    for sname, scores in name_scores.items():
+        categories = [score_to_category(score, mode) for score in scores]
+        if 'UNK' not in categories:
+            if 'F' in categories and 'M' not in categories:
+                gender_alignments[sname] = 'F'
+            elif 'M' in categories and 'F' not in categories:
+                gender_alignments[sname] = 'M'
+    return gender_alignments
+
+def ssa_config(mode, check_decade, ssa_version=None):
+    """
+    The settings that SSA predictions depend on, used as a cache key.
+    """
+    return {'mode': mode, 'check_decade': check_decade,
+            'cutoffs': (HARD_F_CUTOFF, HARD_M_CUTOFF, SOFT_F_CUTOFF, SOFT_M_CUTOFF),
+            'ssa_version': ssa_version}
+
+def predict_gender_ssa(ssa_dict, movie, mode, check_decade=True, cache=None):
     """
     Predicts gender based on gender score. The modes, 'hard' or 'soft', determine the score cutoff
-    for each gender.
+    for each gender. If a PredictionCache is given, it is consulted first; its ssa_version
+    should describe ssa_dict.
     """
     assert(mode == 'hard' or mode == 'soft')
-    gender_alignments = {}
-    year = movie.year
-    for character in movie.characters.values():
-        sname = character.name
-        if ' and ' in sname:
-            individual_names = sname.split(' and ')
-            categories = []
-            for name in individual_names:
-                score = score_gender_ssa(ssa_dict, name, movie_year=year, check_decade=check_decade)
-                categories.append(score_to_category(score, mode))
-            if 'UNK' not in categories:
-                if 'F' in categories and 'M' not in categories:
-                    gender_alignments[sname] = 'F'
-                elif 'M' in categories and 'F' not in categories:
-                    gender_alignments[sname] = 'M'
-        else:
-            score = score_gender_ssa(ssa_dict, sname, movie_year=year, check_decade=check_decade)
-            gen = score_to_category(score, mode)
-            if gen != 'UNK':
-                gender_alignments[sname] = gen
+    if cache is not None:
+        config = ssa_config(mode, check_decade, cache.ssa_version)
+        cached = cache.get(movie, 'ssa', config)
+        if cached is not None:
+            return cached
+    name_scores = score_movie_ssa(ssa_dict, movie, check_decade)
+    gender_alignments = categorize_ssa_scores(name_scores, mode)
+    if cache is not None:
+        cache.put(movie, 'ssa', config, gender_alignments)
     return gender_alignments
 
 if __name__ == "__main__":
@@ -0,0 +1,87 @@
+__author__ = 'Kara Schechtman <kws2121@columbia.edu>, Serina Chang <sc3003@columbia.edu>'
+__date__ = 'Oct 19, 2026'
+
+import numpy as np
+
+'''Columnar view of the characters in a corpus, for bulk gender updates and counts.'''
+
+# Same indices as GENDERS and gender_to_idx in gender/gender_metrics.py; characters
+# without a gender are counted as UNK.
+GENDERS = ['UNK', 'F', 'M', 'BOTH']
+GENDER_TO_CODE = {gen: code for code, gen in enumerate(GENDERS)}
+
+class GenderView(object):
+    """
+    Stores every character in a DataLoader in parallel arrays: the index
+    of its movie, its number of lines and words, and a gender code. Genders
+    are read from the Character objects when the view is made, and assign
+    keeps both in sync afterwards, so counts over the whole corpus are
+    array reductions instead of loops over movies and characters.
+    """
+    def __init__(self, data_loader):
+        self.titles = list(data_loader.movies)
+        self.characters = []
+        self.index = {}  # (title, character name) mapped to position
+        movie_idx = []
+        num_lines = []
+        num_words = []
+        for m, title in enumerate(self.titles):
+            for character in data_loader.movies[title].characters.values():
+                self.index[(title, character.name)] = len(self.characters)
+                self.characters.append(character)
+                movie_idx.append(m)
+                num_lines.append(len(character.line_data))
+                num_words.append(sum(character.line_data))
+        self.movie_idx = np.array(movie_idx, dtype=np.int32)
+        self.num_lines = np.array(num_lines, dtype=np.int64)
+        self.num_words = np.array(num_words, dtype=np.int64)
+        self.gender = np.array([GENDER_TO_CODE.get(c.gender, 0) for c in self.characters],
+                               dtype=np.int8)
+
+    def assign(self, predictions):
+        """
+        Applies a prediction result for the whole corpus in one call.
+        predictions maps movie titles to dictionaries from character names
+        to genders, as returned by get_movie_genders_dict. Characters that
+        are not predicted keep their current gender.
+        """
+        positions = []
+        codes = []
+        for title, pred_dict in predictions.items():
+            for sname, gen in pred_dict.items():
+                i = self.index[(title, sname)]
+                positions.append(i)
+                codes.append(GENDER_TO_CODE[gen])
+                self.characters[i].gender = gen
+        self.gender[np.array(positions, dtype=np.int64)] = np.array(codes, dtype=np.int8)
+
+    def gender_counts(self, movie_titles=None):
+        """
+        Returns a dictionary from gender to the number of characters, lines
+        and words for that gender, over the whole corpus or the given movies.
+        """
+        mask = None
+        if movie_titles is not None:
+            selected = np.zeros(len(self.titles), dtype=bool)
+            title_to_idx = {title: m for m, title in enumerate(self.titles)}
+            selected[[title_to_idx[title] for title in movie_titles]] = True
+            mask = selected[self.movie_idx]
+        gender = self.gender if mask is None else self.gender[mask]
+        num_lines = self.num_lines if mask is None else self.num_lines[mask]
+        num_words = self.num_words if mask is None else self.num_words[mask]
+        char_counts = np.bincount(gender, minlength=len(GENDERS))
+        line_counts = np.bincount(gender, weights=num_lines, minlength=len(GENDERS))
+        word_counts = np.bincount(gender, weights=num_words, minlength=len(GENDERS))
+        counts = {}
+        for code, gen in enumerate(GENDERS):
+            counts[gen] = (int(char_counts[code]), int(line_counts[code]), int(word_counts[code]))
+        return counts
+
+    def gender_counts_per_movie(self):
+        """
+        Returns a (number of movies x number of genders) array of character
+        counts, with rows in the order of self.titles.
+        """
+        counts = np.zeros((len(self.titles), len(GENDERS)), dtype=np.int64)
+        np.add.at(counts, (self.movie_idx, self.gender), 1)
+        return counts
@@ -0,0 +1,159 @@
+__author__ = 'Kara Schechtman <kws2121@columbia.edu>, Serina Chang <sc3003@columbia.edu>'
+__date__ = 'Oct 19, 2026'
+
+import argparse
+import contextlib
+from data_loader import DataLoader, DATA_PATH
+import gc
+import io
+import sys
+import tracemalloc
+
+'''Reports the memory held by a loaded corpus, broken down by component.
+
+Each object is counted once, under the first component that reaches it
+(in the order of COMPONENTS), so shared objects such as interned strings
+and small integers are not counted twice. e.g.
+    python memory_report.py --target 100000 --ssa'''
+
+COMPONENTS = ['movie_metadata', 'imdb_cast', 'characters', 'line_data', 'ssa_dict']
+
+def deep_size(obj, seen):
+    """
+    Returns the size in bytes of obj and everything it refers to through
+    containers and instance dictionaries, skipping objects whose ids are
+    in seen and adding the rest to it.
+    """
+    size = 0
+    stack = [obj]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        elif hasattr(obj, '__dict__'):
+            stack.append(obj.__dict__)
+    return size
+
+def _shallow_object_size(obj, seen):
+    """
+    Returns the size of an object and its instance dictionary only.
+    """
+    size = 0
+    for part in [obj, obj.__dict__]:
+        if id(part) not in seen:
+            seen.add(id(part))
+            size += sys.getsizeof(part)
+    return size
+
+def measure_corpus(data_loader, ssa_dict=None):
+    """
+    Primary function. Returns a dictionary from component in COMPONENTS to
+    the bytes it retains, plus the number of movies and characters:
+    - movie_metadata: Movie objects and every field but the cast and characters
+    - imdb_cast: the cast OrderedDicts, with their names and (actor, gender) tuples
+    - characters: the character dictionaries, Character objects and names
+    - line_data: the line_data lists and their integers
+    - ssa_dict: the SSA dictionary, if given
+    """
+    seen = set()
+    sizes = dict([(component, 0) for component in COMPONENTS])
+    num_chars = 0
+    movies = list(data_loader.movies.values())
+    # The title-to-movie dictionary counts as metadata, without the movies it holds.
+    sizes['movie_metadata'] += sys.getsizeof(data_loader.movies)
+    seen.add(id(data_loader.movies))
+    for title, movie in data_loader.movies.items():
+        sizes['movie_metadata'] += deep_size(title, seen)
+    for movie in movies:
+        sizes['movie_metadata'] += _shallow_object_size(movie, seen)
+        for field, value in movie.__dict__.items():
+            if field not in ('imdb_cast', 'characters'):
+                sizes['movie_metadata'] += deep_size(field, seen) + deep_size(value, seen)
+    for movie in movies:
+        sizes['imdb_cast'] += deep_size(movie.imdb_cast, seen)
+    for movie in movies:
+        sizes['characters'] += sys.getsizeof(movie.characters)
+        seen.add(id(movie.characters))
+        for name, character in movie.characters.items():
+            num_chars += 1
+            sizes['characters'] += deep_size(name, seen) + _shallow_object_size(character, seen)
+            for field, value in character.__dict__.items():
+                if field != 'line_data':
+                    sizes['characters'] += deep_size(field, seen) + deep_size(value, seen)
+    for movie in movies:
+        for character in movie.characters.values():
+            sizes['line_data'] += deep_size(character.line_data, seen)
+    if ssa_dict is not None:
+        sizes['ssa_dict'] = deep_size(ssa_dict, seen)
+    sizes['num_movies'] = len(movies)
+    sizes['num_chars'] = num_chars
+    return sizes
+
+def _fmt_bytes(num_bytes):
+    for unit in ['B', 'KiB', 'MiB']:
+        if abs(num_bytes) < 1024:
+            return '{:.1f} {}'.format(num_bytes, unit)
+        num_bytes /= 1024
+    return '{:.1f} GiB'.format(num_bytes)
+
+def print_report(sizes, target_movies=None, traced_bytes=None):
+    """
+    Prints the bytes per component, the averages per movie and per character
+    and, if target_movies is given, the corpus components scaled linearly by
+    movie count (the SSA dictionary does not grow with the corpus).
+    """
+    num_movies = sizes['num_movies']
+    num_chars = sizes['num_chars']
+    corpus_bytes = sum([sizes[c] for c in COMPONENTS if c != 'ssa_dict'])
+    print('MEMORY REPORT: {} movies, {} characters'.format(num_movies, num_chars))
+    print('{:<16} {:>12} {:>7} {:>12} {:>12}'.format('component', 'total', 'share', 'per movie', 'per char'))
+    for component in COMPONENTS:
+        if component == 'ssa_dict' and sizes[component] == 0:
+            continue
+        share = sizes[component] / corpus_bytes * 100 if component != 'ssa_dict' and corpus_bytes else None
+        print('{:<16} {:>12} {:>7} {:>12} {:>12}'.format(
+              component, _fmt_bytes(sizes[component]),
+              '' if share is None else '{:.1f}%'.format(share),
+              '' if component == 'ssa_dict' or not num_movies else _fmt_bytes(sizes[component] / num_movies),
+              '' if component == 'ssa_dict' or not num_chars else _fmt_bytes(sizes[component] / num_chars)))
+    print('{:<16} {:>12}'.format('corpus total', _fmt_bytes(corpus_bytes)))
+    if traced_bytes is not None:
+        print('{:<16} {:>12} (tracemalloc, while loading)'.format('allocated', _fmt_bytes(traced_bytes)))
+    if target_movies and num_movies:
+        scale = target_movies / num_movies
+        print('Extrapolated to {} movies:'.format(target_movies))
+        for component in COMPONENTS:
+            if component != 'ssa_dict':
+                print('{:<16} {:>12}'.format(component, _fmt_bytes(sizes[component] * scale)))
+        print('{:<16} {:>12}'.format('corpus total', _fmt_bytes(corpus_bytes * scale)))
+        if sizes['ssa_dict']:
+            print('{:<16} {:>12}'.format('with ssa_dict', _fmt_bytes(corpus_bytes * scale + sizes['ssa_dict'])))
+    print('----------------------------')
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Report the memory held by a loaded corpus.')
+    parser.add_argument('--data_path', default=DATA_PATH)
+    parser.add_argument('--target', type=int, help='number of movies to extrapolate to')
+    parser.add_argument('--ssa', action='store_true', help='also load and measure the SSA dictionary')
+    parser.add_argument('--ssa_path', help='directory of SSA files, if not the default')
+    args = parser.parse_args()
+
+    gc.collect()
+    tracemalloc.start()
+    with contextlib.redirect_stdout(io.StringIO()):
+        data = DataLoader(args.data_path, verbose=False)
+    gc.collect()
+    traced_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    ssa_dict = None
+    if args.ssa:
+        from gender.ssa_matching import make_ssa_dict, PATH_TO_SSA
+        ssa_dict = make_ssa_dict(args.ssa_path or PATH_TO_SSA)
+    print_report(measure_corpus(data, ssa_dict), args.target, traced_bytes)
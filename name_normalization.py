@@ -0,0 +1,76 @@
+__author__ = 'Kara Schechtman <kws2121@columbia.edu>, Serina Chang <sc3003@columbia.edu>'
+__date__ = 'Oct 19, 2026'
+
+from functools import lru_cache
+import string
+import sys
+
+'''Normalization of character and actor names, shared by preprocessing, SSA scoring and IMDb alignment.
+
+Each function is memoized, so a distinct name is normalized once per
+process however many movies, scorers or alignments see it, and returns
+interned strings (and tuples of them), so equal names share one object.
+Callers must not mutate the results.'''
+
+_PUNCTUATION = str.maketrans('', '', string.punctuation)
+
+@lru_cache(maxsize=None)
+def variant_to_root(var):
+    """
+    Transforms a variant of a screenplay character name to its root,
+    e.g. "WILLY (V.O.)" --> "willy", "CATE'S VOICE" --> "cate".
+    """
+    var = var.lower()
+    var = var.split(' (', 1)[0]  # e.g. willy (v.o.) --> willy
+    var = var.strip(':')  # carol: --> carol
+
+    # handle voice-overs
+    if '\'s voice' in var:  # e.g. cate's voice --> cate
+        var = var.split('\'s', 1)[0]
+    elif 's\' voice' in var or 'z\' voice' in var:  # e.g. chris' voice --> chris
+        var = var.split('\'', 1)[0]
+    elif ' voice' in var or ' voice over' in var or ' voice-over' in var:
+        var = var.split(' voice', 1)[0]
+
+    return sys.intern(var.translate(_PUNCTUATION))
+
+@lru_cache(maxsize=None)
+def name_tokens(char_name):
+    """
+    Splits a character name into lowercase tokens, treating '/' as a
+    space. Returns a tuple.
+    """
+    return tuple([sys.intern(tok) for tok in char_name.replace('/', ' ').lower().split()])
+
+@lru_cache(maxsize=None)
+def canonical_name(name):
+    """
+    Lowercases and strips a name from an IMDb cast entry.
+    """
+    return sys.intern(name.lower().strip())
+
+@lru_cache(maxsize=None)
+def clean_imdb_char_name(text):
+    """
+    Cleans a character name extracted from an IMDb page: strips commas and
+    parenthesized notes from each of the names a row may list, separated
+    by '/', e.g. "Carol Aird (uncredited) / Herself" --> "Carol Aird/Herself".
+    """
+    text = text.replace(',', '')  # strip commas
+    char_names = text.split('/')  # sometimes a row lists multiple character names
+    cleaned_names = []
+    for cn in char_names:
+        cleaned_names.append(cn.split('(')[0].strip())
+    return sys.intern('/'.join(cleaned_names))
+
+_CACHED = [variant_to_root, name_tokens, canonical_name, clean_imdb_char_name]
+
+def cache_info():
+    """
+    Returns each function's name mapped to its lru_cache statistics.
+    """
+    return {fn.__name__: fn.cache_info() for fn in _CACHED}
+
+def clear_caches():
+    for fn in _CACHED:
+        fn.cache_clear()
@@ -0,0 +1,139 @@
+__author__ = 'Kara Schechtman <kws2121@columbia.edu>, Serina Chang <sc3003@columbia.edu>'
+__date__ = 'Oct 19, 2026'
+
+import argparse
+import csv
+import json
+import os
+import queue
+import threading
+from data_loader import DATA_PATH, iter_movie_files, load_movie_file
+from predict_gender import get_movie_genders_dict
+
+'''Streaming load -> predict -> write pipeline over a corpus.'''
+
+QUEUE_SIZE = 16
+OUTPUT_FIELDS = ['movie', 'character', 'gender', 'lines']
+_DONE = object()  # marks the end of a stage's output
+
+class _Stage(threading.Thread):
+    """
+    A pipeline worker. Reads items from an input queue until it has seen
+    one end marker per upstream worker, hands each to process_fn and
+    forwards the results to the output queue. Bounded queues give
+    backpressure: a fast stage blocks until the next one catches up.
+    If any stage fails, the others stop processing but keep draining and
+    forwarding end markers so that nothing blocks forever.
+    """
+    def __init__(self, process_fn, in_queue, out_queue, num_upstream, failures):
+        threading.Thread.__init__(self, daemon=True)
+        self.process_fn = process_fn
+        self.in_queue = in_queue
+        self.out_queue = out_queue
+        self.num_upstream = num_upstream
+        self.failures = failures
+
+    def run(self):
+        done = 0
+        while done < self.num_upstream:
+            item = self.in_queue.get()
+            if item is _DONE:
+                done += 1
+                continue
+            if self.failures:
+                continue
+            try:
+                result = self.process_fn(item)
+                if self.out_queue is not None:
+                    self.out_queue.put(result)
+            except Exception as e:
+                self.failures.append(e)
+        if self.out_queue is not None:
+            self.out_queue.put(_DONE)
+
+def _parse_files(data_dir, parsed, num_predictors, failures):
+    """
+    First stage: parses movie files one at a time.
+    """
+    try:
+        for filepath in iter_movie_files(data_dir):
+            if failures:
+                break
+            parsed.put(load_movie_file(filepath))
+    except Exception as e:
+        failures.append(e)
+    for _ in range(num_predictors):
+        parsed.put(_DONE)
+
+def _predict(movie):
+    """
+    Second stage: predicts genders and keeps only what is written out.
+    """
+    pred_dict = get_movie_genders_dict(movie)
+    rows = []
+    for character in movie.characters.values():
+        rows.append({'movie': movie.title,
+                     'character': character.name,
+                     'gender': pred_dict.get(character.name),
+                     'lines': len(character.line_data)})
+    return rows
+
+class _RowWriter(object):
+    """
+    Third stage: writes rows as NDJSON or CSV.
+    """
+    def __init__(self, out_file, fmt):
+        assert(fmt == 'ndjson' or fmt == 'csv')
+        self.out_file = out_file
+        self.fmt = fmt
+        self.num_movies = 0
+        if fmt == 'csv':
+            self.csv_writer = csv.DictWriter(out_file, fieldnames=OUTPUT_FIELDS)
+            self.csv_writer.writeheader()
+
+    def __call__(self, rows):
+        for row in rows:
+            if self.fmt == 'csv':
+                self.csv_writer.writerow(row)
+            else:
+                self.out_file.write(json.dumps(row) + '\n')
+        self.out_file.flush()
+        self.num_movies += 1
+
+def run_pipeline(out_fn, data_path=DATA_PATH, fmt='ndjson', num_predictors=1, queue_size=QUEUE_SIZE):
+    """
+    Primary function. Parses, predicts and writes movies concurrently,
+    with at most queue_size movies waiting between two stages, so memory
+    stays bounded however large the corpus is and output starts appearing
+    as soon as the first movie is predicted. Writes one row per character:
+    movie title, character name, predicted gender (empty if unknown) and
+    number of lines. Returns the number of movies written.
+    """
+    data_dir = os.path.join(os.getcwd(), data_path)
+    parsed = queue.Queue(maxsize=queue_size)
+    predicted = queue.Queue(maxsize=queue_size)
+    failures = []
+    with open(out_fn, 'w', newline='') as out_file:
+        writer = _RowWriter(out_file, fmt)
+        threads = [threading.Thread(target=_parse_files, args=(data_dir, parsed, num_predictors, failures), daemon=True)]
+        for _ in range(num_predictors):
+            threads.append(_Stage(_predict, parsed, predicted, 1, failures))
+        threads.append(_Stage(writer, predicted, None, num_predictors, failures))
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    if failures:
+        raise failures[0]
+    return writer.num_movies
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Predict genders for a corpus, streaming results to a file.')
+    parser.add_argument('out_fn')
+    parser.add_argument('--data_path', default=DATA_PATH)
+    parser.add_argument('--format', default='ndjson', choices=['ndjson', 'csv'])
+    parser.add_argument('--predictors', type=int, default=1)
+    parser.add_argument('--queue_size', type=int, default=QUEUE_SIZE)
+    args = parser.parse_args()
+    num_movies = run_pipeline(args.out_fn, args.data_path, args.format, args.predictors, args.queue_size)
+    print('Wrote predictions for {} movies to {}'.format(num_movies, args.out_fn))
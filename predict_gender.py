@@ -1,19 +1,40 @@
 from gender.imdb_matching import *
 from gender.ssa_matching import *
+from prediction_cache import PredictionCache
+from tracing import span
 
 SSA_DICT = make_ssa_dict()
+PREDICTION_CACHE = PredictionCache(ssa_version=ssa_table_version())
 
-def get_movie_genders_dict(movie):
+def get_movie_genders_dict(movie, cache=PREDICTION_CACHE):
     """
     Given a movie object, predict the gender of all characters.
     Returns a dictionary matching from character names to genders.
     If a charater's gender cannot be assigned with
     confidence, the character name will not appear in the dictionary.
+    Predictions are read from and saved to the cache; pass cache=None
+    to always recompute.
     """
-    imdb_pred_dict = predict_gender_imdb(movie, alignment_fn=in_align, assignment_fn=soft_backtrack)
-    ssa_pred_dict = predict_gender_ssa(SSA_DICT, movie, mode='hard', check_decade=True)
+    with span('predict_movie', movie=movie.title, cast_size=len(movie.imdb_cast or ()),
+              num_chars=len(movie.characters)):
+        return _predict_movie_genders(movie, cache)
+
+def _predict_movie_genders(movie, cache):
+    if cache is not None:
+        config = imdb_config(in_align, soft_backtrack)
+        config.update(ssa_config('hard', True, cache.ssa_version))
+        config['ssa_trumps'] = True
+        cached = cache.get(movie, 'hybrid', config)
+        if cached is not None:
+            return cached
+    # SSA wins wherever it makes a prediction, so IMDb matching is only
+    # needed for the characters it leaves unresolved.
+    ssa_pred_dict = predict_gender_ssa(SSA_DICT, movie, mode='hard', check_decade=True, cache=cache)
+    imdb_pred_dict = predict_gender_imdb_staged(movie, alignment_fn=in_align, assignment_fn=soft_backtrack,
+                                                resolved=set(ssa_pred_dict))
     pred_dict = _merge_dict(ssa_pred_dict, imdb_pred_dict, True)
-    ordered_snames = sorted(list(pred_dict.keys()))
+    if cache is not None:
+        cache.put(movie, 'hybrid', config, pred_dict)
     return pred_dict
 
 def _merge_dict(ssa_pred_dict, imdb_pred_dict, ssa_trumps=True):
@@ -37,3 +58,11 @@ def _merge_dict(ssa_pred_dict, imdb_pred_dict, ssa_trumps=True):
             else:
                 merged_dict[sname] = imdb_pred_dict[sname]
     return merged_dict
+
+def get_corpus_genders_dict(data_loader, cache=PREDICTION_CACHE):
+    """
+    Predicts the gender of all characters in every movie of a DataLoader.
+    Returns a dictionary from movie titles to the dictionaries returned
+    by get_movie_genders_dict, ready to be applied with GenderView.assign.
+    """
+    return {title: get_movie_genders_dict(movie, cache) for title, movie in data_loader.movies.items()}
@@ -0,0 +1,94 @@
+__author__ = 'Kara Schechtman <kws2121@columbia.edu>, Serina Chang <sc3003@columbia.edu>'
+__date__ = 'Oct 19, 2026'
+
+import hashlib
+import json
+import os
+from preprocessing.file_utils import atomic_write
+
+'''On-disk cache of gender predictions, keyed by movie content and configuration.'''
+
+PATH_TO_PREDICTION_CACHE = './data/cache/predictions/'
+# Part of every key. Bump it whenever the prediction logic changes (alignment,
+# assignment, merging, SSA scoring, name tokenization), so old entries miss.
+PREDICTION_VERSION = 1
+
+class PredictionCache(object):
+    """
+    Stores gender prediction dictionaries on disk. An entry is keyed by
+    a fingerprint of the movie (character names, year and IMDb cast),
+    the kind of prediction ('imdb', 'ssa' or 'hybrid') and the prediction
+    configuration, so changing one setting only misses the entries that
+    depend on it. Functions in the configuration are keyed by name only,
+    so edits to them are caught by PREDICTION_VERSION alone.
+    ssa_version identifies the SSA table that predictions were made
+    with; callers include it in the configuration of SSA-based entries.
+    """
+    def __init__(self, path=PATH_TO_PREDICTION_CACHE, ssa_version=None):
+        self.path = path
+        self.ssa_version = ssa_version
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, movie, kind, config):
+        """
+        Makes the cache key for a prediction of some kind for a movie.
+        """
+        config_str = json.dumps(_normalize_config(config), sort_keys=True)
+        h = hashlib.sha1()
+        h.update(str(PREDICTION_VERSION).encode('utf-8'))
+        h.update(movie_fingerprint(movie).encode('utf-8'))
+        h.update(kind.encode('utf-8'))
+        h.update(config_str.encode('utf-8'))
+        return h.hexdigest()
+
+    def get(self, movie, kind, config):
+        """
+        Returns the cached prediction dictionary, or None on a miss.
+        """
+        entry_fn = self._entry_path(self.key(movie, kind, config))
+        try:
+            with open(entry_fn, 'r') as f:
+                pred_dict = json.load(f)
+        except (IOError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return pred_dict
+
+    def put(self, movie, kind, config, pred_dict):
+        """
+        Saves a prediction dictionary. The entry is written atomically, so
+        a crash never leaves a partial entry behind.
+        """
+        with atomic_write(self._entry_path(self.key(movie, kind, config)), sync=False) as f:
+            json.dump(pred_dict, f)
+
+    def _entry_path(self, key):
+        return os.path.join(self.path, key[:2], key + '.json')
+
+def movie_fingerprint(movie):
+    """
+    Hashes the parts of a movie that predictions depend on: character
+    names (in order, since assignment breaks ties by order), year and
+    IMDb cast.
+    """
+    imdb_cast = None
+    if movie.imdb_cast is not None:
+        imdb_cast = [[iname] + list(info) for iname, info in movie.imdb_cast.items()]
+    content = json.dumps([list(movie.characters), movie.year, imdb_cast])
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+def _normalize_config(config):
+    """
+    Makes a configuration JSON-serializable; functions are identified
+    by name so the key is the same however the module was imported.
+    """
+    normalized = {}
+    for name, value in config.items():
+        if callable(value):
+            value = value.__name__
+        elif isinstance(value, tuple):
+            value = list(value)
+        normalized[name] = value
+    return normalized
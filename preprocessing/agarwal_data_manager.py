@@ -19,61 +19,197 @@ IMDB_CAST_KEY = 'IMDB Cast: '
 CHARACTER = 'C|'
 DIALOGUE = 'D|'
 
-import os
+import argparse
 from character import Character
-from collections import OrderedDict
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from file_utils import atomic_write
+import hashlib
+from itertools import islice
+import json
 from movie import Movie
-import string
+from name_normalization import variant_to_root
+import os
+
+NUM_METADATA_LINES = 8
+MANIFEST_FN = '.agarwal_manifest.json'  # in DATA_PATH; the line-count files written last run
+WRITTEN = 'written'
+UNCHANGED = 'unchanged'
+REMOVED = 'removed'
 
 class AgarwalDataManager(object):
     """
     Loads metadata and data of movie files into Movie objects.
+    To convert every file without keeping them all in memory, use
+    convert_agarwal_files instead.
     """
     def __init__(self):
+        self.filepaths = _list_agarwal_files()
         self.movies = []
-        data_dir = os.path.join(DATA_PATH, AGARWAL_DIR)
-        for filename in os.listdir(data_dir):
-            if filename.endswith('.txt'):
-                filepath = os.path.join(data_dir, filename)
-                with open(filepath, 'r') as file:
-                    lines = file.readlines()
-                    _check_metadata_format(lines, filename)
-
-                    # Extract data from files.
-                    imdb = _read_field(lines[0])
-                    title = _read_field(lines[1])
-                    year = _read_field(lines[2], cast_fn=int)
-                    genre = _read_field(lines[3], split=True)
-                    director = _read_field(lines[4])
-                    rating = _read_field(lines[5], cast_fn=float)
-                    bechdel_score = _read_field(lines[6], cast_fn=int)
-                    imdb_cast_list = _read_field(lines[7], split=True)
-                    imdb_cast = imdb_cast_list if not imdb_cast_list \
-                                else [tuple(entry.split(' | ')) for entry in imdb_cast_list]
-                    characters = _extract_characters(lines[8:])
-
-                # Create movie object and save.
-                self.movies.append(Movie(imdb, title, year,
-                                         genre, director, rating,
-                                         bechdel_score, imdb_cast,
-                                         characters))
+        for filepath in self.filepaths:
+            self.movies.append(_read_movie(filepath))
 
     def write(self):
-        for movie in self.movies:
-            filename = '%s/%s.txt' % (DATA_PATH, movie.title)
-            with open(filename, 'w+') as file:
-                print(movie.title)
-                file.write('%s%s\n' % (IMDB_KEY, movie.imdb))
-                file.write('%s%s\n' % (TITLE_KEY, movie.title))
-                file.write('%s%s\n' % (YEAR_KEY, movie.year))
-                file.write('%s%s\n' % (GENRE_KEY, ', '.join(movie.genre)))
-                file.write('%s%s\n' % (DIRECTOR_KEY, movie.director))
-                file.write('%s%s\n' % (RATING_KEY, movie.rating))
-                file.write('%s%s\n' % (BECHDEL_SCORE_KEY, movie.bechdel_score))
-                file.write('%s%s\n\n' % (IMDB_CAST_KEY, ', '.join('%s | %s' % (tup[0], tup[1]) for tup in movie.imdb_cast)))
-                for character in movie.characters:
-                    file.write('%s: %s\n' % (character.name, ', '.join(['%s' % (i) for i in character.line_data])))
+        """
+        Writes the line-count files, skipping those that have not changed,
+        and removes the ones left from movies no longer loaded. Returns the
+        number of files written, unchanged and removed.
+        """
+        filenames = _output_filenames([(movie.title, movie.imdb, filepath)
+                                       for movie, filepath in zip(self.movies, self.filepaths)])
+        return _finish_writing([_write_movie(movie, filename) for movie, filename in zip(self.movies, filenames)])
 
+def _list_agarwal_files():
+    data_dir = os.path.join(DATA_PATH, AGARWAL_DIR)
+    return [os.path.join(data_dir, filename) for filename in sorted(os.listdir(data_dir))
+            if filename.endswith('.txt')]
+
+def _read_title_and_imdb(filepath):
+    """
+    Reads the title and IMDb ID of an Agarwal file, without its script.
+    """
+    with open(filepath, 'r') as file:
+        lines = list(islice(file, NUM_METADATA_LINES))
+    _check_metadata_format(lines, os.path.basename(filepath))
+    return _read_field(lines[1]), _read_field(lines[0])
+
+def _output_filenames(movies):
+    """
+    Returns the line-count filename for each (title, IMDb ID, Agarwal file)
+    in movies, named after the title. Movies that share a title (e.g.
+    remakes) would overwrite each other's file, so with a warning they are
+    named after the title and IMDb ID instead, or the title and Agarwal
+    file name if they share the IMDb ID too.
+    """
+    title_counts = Counter([title for title, _, _ in movies])
+    title_imdb_counts = Counter([(title, imdb) for title, imdb, _ in movies])
+    filenames = []
+    for title, imdb, filepath in movies:
+        name = title
+        if title_counts[title] > 1:
+            suffix = imdb
+            if title_imdb_counts[(title, imdb)] > 1:
+                suffix = os.path.splitext(os.path.basename(filepath))[0]
+            name = '%s (%s)' % (title, suffix)
+            print('Warning: title %s is shared, so %s is written to %s.txt' % (title, os.path.basename(filepath), name))
+        filenames.append('%s/%s.txt' % (DATA_PATH, name))
+    return filenames
+
+def _read_movie(filepath):
+    """
+    Reads one Agarwal file into a Movie object. Only the metadata lines
+    are kept; the script is streamed through _extract_characters.
+    """
+    with open(filepath, 'r') as file:
+        lines = list(islice(file, NUM_METADATA_LINES))
+        _check_metadata_format(lines, os.path.basename(filepath))
+
+        # Extract data from files.
+        imdb = _read_field(lines[0])
+        title = _read_field(lines[1])
+        year = _read_field(lines[2], cast_fn=int)
+        genre = _read_field(lines[3], split=True)
+        director = _read_field(lines[4])
+        rating = _read_field(lines[5], cast_fn=float)
+        bechdel_score = _read_field(lines[6], cast_fn=int)
+        imdb_cast_list = _read_field(lines[7], split=True)
+        imdb_cast = imdb_cast_list if not imdb_cast_list \
+                    else [tuple(entry.split(' | ')) for entry in imdb_cast_list]
+        characters = _extract_characters(file)
+
+    # Agarwal files have no Oscar line.
+    return Movie(imdb, title, year,
+                 genre, director, rating,
+                 bechdel_score, imdb_cast,
+                 None, characters)
+
+def _render_movie(movie):
+    """
+    Returns the contents of the line-count file of a Movie object.
+    """
+    lines = ['%s%s\n' % (IMDB_KEY, movie.imdb),
+             '%s%s\n' % (TITLE_KEY, movie.title),
+             '%s%s\n' % (YEAR_KEY, movie.year),
+             '%s%s\n' % (GENRE_KEY, ', '.join(movie.genre)),
+             '%s%s\n' % (DIRECTOR_KEY, movie.director),
+             '%s%s\n' % (RATING_KEY, movie.rating),
+             '%s%s\n' % (BECHDEL_SCORE_KEY, movie.bechdel_score),
+             '%s%s\n\n' % (IMDB_CAST_KEY, ', '.join('%s | %s' % (tup[0], tup[1]) for tup in movie.imdb_cast))]
+    for character in movie.characters:
+        lines.append('%s: %s\n' % (character.name, ', '.join(['%s' % (i) for i in character.line_data])))
+    return ''.join(lines)
+
+def _digest(content):
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+def _write_movie(movie, filename):
+    """
+    Writes the line-count file of a Movie object to filename (see
+    _output_filenames), atomically, unless the file on disk already has
+    the same contents. Returns its filename, whether it was written or
+    unchanged, and the hash of its contents.
+    """
+    content = _render_movie(movie)
+    digest = _digest(content)
+    if os.path.exists(filename):
+        try:
+            with open(filename, 'r') as file:
+                if _digest(file.read()) == digest:
+                    return filename, UNCHANGED, digest
+        except UnicodeDecodeError:
+            pass  # rewrite it
+    with atomic_write(filename) as file:
+        file.write(content)
+    print(movie.title)
+    return filename, WRITTEN, digest
+
+def _finish_writing(results):
+    """
+    Removes the line-count files written last run that were not written
+    this time, since their movies are gone, and saves the manifest of the
+    files written this time. Returns the number of files written, unchanged
+    and removed.
+    """
+    manifest_fn = os.path.join(DATA_PATH, MANIFEST_FN)
+    old_manifest = {}
+    if os.path.exists(manifest_fn):
+        with open(manifest_fn, 'r') as f:
+            old_manifest = json.load(f)
+    manifest = {os.path.relpath(filename, DATA_PATH): digest for filename, _, digest in results}
+    counts = Counter([status for _, status, _ in results])
+    for name in sorted(set(old_manifest) - set(manifest)):
+        filename = os.path.join(DATA_PATH, name)
+        if os.path.exists(filename):
+            os.remove(filename)
+            counts[REMOVED] += 1
+    with atomic_write(manifest_fn) as f:
+        json.dump(manifest, f, indent=0, sort_keys=True)
+    print('Line-count files: {} written, {} unchanged, {} removed'.format(
+          counts[WRITTEN], counts[UNCHANGED], counts[REMOVED]))
+    return counts
+
+def _convert_file(filepath, filename):
+    return _write_movie(_read_movie(filepath), filename)
+
+def convert_agarwal_files(workers=None):
+    """
+    Primary function. Converts each Agarwal file into a line-count file, one
+    file per task on a pool of worker processes (by default, one per core),
+    so only the files being converted are in memory at a time. With workers
+    set to 1, everything runs in this process. As with AgarwalDataManager.write,
+    unchanged files are skipped and files of movies that are gone are removed.
+    Output filenames are chosen before any task starts, so no two tasks
+    write the same file. Returns the number of files written, unchanged
+    and removed.
+    """
+    filepaths = _list_agarwal_files()
+    filenames = _output_filenames([_read_title_and_imdb(fp) + (fp,) for fp in filepaths])
+    if workers == 1 or len(filepaths) <= 1:
+        return _finish_writing([_convert_file(fp, fn) for fp, fn in zip(filepaths, filenames)])
+    workers = workers or os.cpu_count()
+    chunksize = max(1, len(filepaths) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return _finish_writing(list(executor.map(_convert_file, filepaths, filenames, chunksize=chunksize)))
 
 def _read_field(line, cast_fn = None, split = False):
     """
@@ -89,25 +225,6 @@ def _read_field(line, cast_fn = None, split = False):
     else:
         return field
 
-def _variant_to_root(var):
-    """
-    Transforms a variant of a character name to its root.
-    """
-    var = var.lower()
-    var = var.split(' (', 1)[0]  # e.g. willy (v.o.) --> willy
-    var = var.strip(':')  # carol: --> carol
-
-    # handle voice-overs
-    if '\'s voice' in var:  # e.g. cate's voice --> cate
-        var = var.split('\'s', 1)[0]
-    elif 's\' voice' in var or 'z\' voice' in var:  # e.g. chris' voice --> chris
-        var = var.split('\'', 1)[0]
-    elif ' voice' in var or ' voice over' in var or ' voice-over' in var:
-        var = var.split(' voice', 1)[0]
-
-    translator = str.maketrans('', '', string.punctuation)
-    return var.translate(translator)
-
 def _check_metadata_format(lines, filename):
     """
     Helper function to check the metadata of the file
@@ -129,35 +246,30 @@ def _check_metadata_format(lines, filename):
 def _extract_characters(script):
     """
     Helper to extract information on character dialogue lines
-    from the Agarwal script.
+    from the Agarwal script. Words are counted as the D| lines come in,
+    so no dialogue text is kept. As before, dialogue before the first C|
+    line goes to a character named None, and the dialogue after the last
+    C| line is not counted.
     """
     name = None
-    dialogue = ''
-    names = OrderedDict()
+    num_words = 0
+    names = OrderedDict()  # name mapped to the word counts of its lines
     for datum in script:
         if datum.startswith(CHARACTER):
-            if name in names.keys():
-                names[name].append(dialogue.strip())
-            else:
-                names[name] = [dialogue.strip()]
-            name = _variant_to_root(datum.split(CHARACTER)[1].strip())
-            dialogue = ''
-        if datum.startswith(DIALOGUE):
-            dialogue += ' ' + datum.split(DIALOGUE)[1].strip()
+            line_data = names.setdefault(name, [])
+            if num_words != 0:
+                line_data.append(num_words)
+            name = variant_to_root(datum.split(CHARACTER)[1].strip())
+            num_words = 0
+        elif datum.startswith(DIALOGUE):
+            # Only the text up to any further D| counts, as with split(DIALOGUE)[1].
+            num_words += len(datum[len(DIALOGUE):].split(DIALOGUE, 1)[0].split())
 
     # Create and save character objects.
-    characters = []
-    for name in names:
-        line_data = []
-        for line in names[name]:
-            words = line.split()
-            if len(words) != 0:
-                line_data.append(len(words))
-        if len(line_data) != 0:
-            characters.append(Character(name, line_data))
-    return characters
+    return [Character(name, line_data) for name, line_data in names.items() if len(line_data) != 0]
 
 if __name__ == "__main__":
-    adm = AgarwalDataManager()
-    print(len(adm.movies))
-    adm.write()
+    parser = argparse.ArgumentParser(description='Write line-count files for the Agarwal screenplays.')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: one per core)')
+    args = parser.parse_args()
+    convert_agarwal_files(args.workers)
@@ -0,0 +1,200 @@
+__author__ = 'Kara Schechtman <kws2121@columbia.edu>, Serina Chang <sc3003@columbia.edu>'
+__date__ = 'Oct 19, 2026'
+
+import argparse
+from bisect import bisect_left
+from file_utils import atomic_write
+import glob
+import json
+import mmap
+import os
+import struct
+
+'''On-disk index of IMDb ID mapped to Bechdel rating, built from a bechdeltest.com dump.
+
+The index is a header followed by fixed-width records sorted by IMDb ID:
+    header: magic, source size, source mtime (ns), number of records
+    record: IMDb ID (KEY_WIDTH bytes), rating (RATING_WIDTH bytes), both NUL-padded
+It is memory-mapped and binary searched, so looking up a rating never
+parses the dump. The header records which dump the index was built from;
+when the dump changes, or a newer one is added, the index is rebuilt.'''
+
+PATH_TO_BECHDEL_DIR = '../data/bechdel/'
+PATH_TO_BECHDEL_INDEX = '../data/cache/bechdel_index.bin'
+MAGIC = b'BDX1'
+HEADER = struct.Struct('<4sQqQ')
+KEY_WIDTH = 12
+RATING_WIDTH = 4
+RECORD_WIDTH = KEY_WIDTH + RATING_WIDTH
+CHUNK_SIZE = 1 << 16  # characters read from the dump at a time
+WHITESPACE = ' \t\r\n'
+ITEM_ENDS = WHITESPACE + ',]'
+
+def latest_dump(bechdel_dir=PATH_TO_BECHDEL_DIR):
+    """
+    Returns the newest dump in bechdel_dir. Dumps are named by date,
+    e.g. bechdel_20190124.json, so the newest sorts last.
+    """
+    dumps = sorted(glob.glob(os.path.join(bechdel_dir, 'bechdel_*.json')))
+    if not dumps:
+        raise IOError('No Bechdel dump in {}'.format(bechdel_dir))
+    return dumps[-1]
+
+def iter_json_array(f, chunk_size=CHUNK_SIZE):
+    """
+    Yields the items of the JSON array in file f one at a time, reading
+    chunk_size characters at a time, so the whole array is never in memory.
+    An item is only yielded once the character after it is read, since a
+    number cut off by the end of a chunk (e.g. '12' of '12345') decodes.
+    """
+    decoder = json.JSONDecoder()
+    buf, pos = '', 0
+    opened = False
+    eof = False
+    while True:
+        while pos < len(buf) and (buf[pos] in WHITESPACE or (opened and buf[pos] == ',')):
+            pos += 1
+        if pos < len(buf):
+            if not opened:
+                if buf[pos] != '[':
+                    raise ValueError('Expected a JSON array')
+                opened = True
+                pos += 1
+                continue
+            if buf[pos] == ']':
+                return
+            try:
+                item, end = decoder.raw_decode(buf, pos)
+            except ValueError:
+                end = None  # the item runs past the end of buf
+            if end is not None and (eof or (end < len(buf) and buf[end] in ITEM_ENDS)):
+                pos = end
+                yield item
+                continue
+        if eof:
+            raise ValueError('Truncated JSON array')
+        chunk = f.read(chunk_size)
+        eof = not chunk
+        buf = buf[pos:] + chunk
+        pos = 0
+
+def _pack(text, width):
+    packed = text.encode('utf-8')
+    if len(packed) > width:
+        raise ValueError('Too long for the index: {}'.format(text))
+    return packed.ljust(width, b'\0')
+
+def build_index(json_path, index_path=PATH_TO_BECHDEL_INDEX):
+    """
+    Streams the dump at json_path into an index at index_path. As with
+    a dict, a later entry for the same IMDb ID replaces an earlier one.
+    Returns the number of records.
+    """
+    stat = os.stat(json_path)
+    ratings = {}
+    with open(json_path, 'r', encoding='utf-8') as f:
+        for entry in iter_json_array(f):
+            ratings[_pack(str(entry['imdbid']), KEY_WIDTH)] = _pack(str(entry['rating']), RATING_WIDTH)
+    with atomic_write(index_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, stat.st_size, stat.st_mtime_ns, len(ratings)))
+        for key in sorted(ratings):
+            f.write(key + ratings[key])
+    return len(ratings)
+
+def index_is_current(json_path, index_path=PATH_TO_BECHDEL_INDEX):
+    """
+    Returns whether the index at index_path was built from the dump at
+    json_path as it is now.
+    """
+    if not os.path.exists(index_path):
+        return False
+    with open(index_path, 'rb') as f:
+        header = f.read(HEADER.size)
+    if len(header) < HEADER.size:
+        return False
+    magic, size, mtime_ns, _ = HEADER.unpack(header)
+    stat = os.stat(json_path)
+    return magic == MAGIC and size == stat.st_size and mtime_ns == stat.st_mtime_ns
+
+class BechdelIndex(object):
+    """
+    Read-only view of an index file. get(imdb_id) returns the rating as
+    a string, like the dict it replaces, or the default if the movie has
+    no rating. Use it as a context manager, or call close when done.
+    """
+    def __init__(self, index_path=PATH_TO_BECHDEL_INDEX):
+        with open(index_path, 'rb') as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, _, _, self.num_records = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC:
+            self.mm.close()
+            raise ValueError('Not a Bechdel index: {}'.format(index_path))
+        self.keys = _KeyView(self.mm, self.num_records)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def __len__(self):
+        return self.num_records
+
+    def __contains__(self, imdb_id):
+        return self.get(imdb_id) is not None
+
+    def get(self, imdb_id, default=None):
+        try:
+            key = _pack(str(imdb_id), KEY_WIDTH)
+        except ValueError:
+            return default
+        i = bisect_left(self.keys, key)
+        if i == self.num_records or self.keys[i] != key:
+            return default
+        start = HEADER.size + i * RECORD_WIDTH + KEY_WIDTH
+        return self.mm[start:start + RATING_WIDTH].rstrip(b'\0').decode('utf-8')
+
+    def close(self):
+        self.mm.close()
+
+class _KeyView(object):
+    """
+    The sorted keys of the records, as a sequence for bisect.
+    """
+    def __init__(self, mm, num_records):
+        self.mm = mm
+        self.num_records = num_records
+
+    def __len__(self):
+        return self.num_records
+
+    def __getitem__(self, i):
+        start = HEADER.size + i * RECORD_WIDTH
+        return self.mm[start:start + KEY_WIDTH]
+
+def open_bechdel_index(json_path=None, index_path=PATH_TO_BECHDEL_INDEX):
+    """
+    Primary function. Returns the BechdelIndex for the dump at json_path
+    (by default, the newest one), building the index first if it is
+    missing or was built from another dump.
+    """
+    json_path = json_path or latest_dump()
+    if not index_is_current(json_path, index_path):
+        print('Indexing Bechdel ratings from', json_path)
+        build_index(json_path, index_path)
+    return BechdelIndex(index_path)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Build or query the Bechdel rating index.')
+    parser.add_argument('--json_path', default=None, help='dump to index (default: the newest)')
+    parser.add_argument('--index_path', default=PATH_TO_BECHDEL_INDEX)
+    parser.add_argument('--force', action='store_true', help='rebuild even if the index is current')
+    parser.add_argument('--lookup', nargs='*', default=[], help='IMDb IDs to look up')
+    args = parser.parse_args()
+    if args.force:
+        print('Indexed {} ratings'.format(build_index(args.json_path or latest_dump(), args.index_path)))
+    with open_bechdel_index(args.json_path, args.index_path) as index:
+        print('{} ratings in {}'.format(len(index), args.index_path))
+        for imdb_id in args.lookup:
+            print(imdb_id, index.get(imdb_id))
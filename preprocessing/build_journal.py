@@ -0,0 +1,98 @@
+__author__ = 'Kara Schechtman <kws2121@columbia.edu>, Serina Chang <sc3003@columbia.edu>'
+__date__ = 'Oct 19, 2026'
+
+from collections import Counter
+import json
+import os
+import time
+
+'''Append-only journal of corpus build progress, for exact resumes.'''
+
+DONE = 'done'
+SKIPPED = 'skipped'
+FAILED = 'failed'
+STATUSES = {DONE, SKIPPED, FAILED}
+FLUSH_EVERY = 20  # records
+
+class BuildJournal(object):
+    """
+    Records what happened to each input of a corpus build, one JSON line
+    per record: the input, its status (done, skipped or failed), a reason
+    and the output file, if any. Records are buffered and appended every
+    flush_every records, and on flush or close. An input's latest record
+    wins, so whether an input is pending never depends on directory order.
+    A crash loses at most the unflushed records; their inputs are redone,
+    and since outputs are written atomically, a redone output simply
+    replaces the old one. A torn last line from a crash is dropped.
+    """
+    def __init__(self, path, flush_every=FLUSH_EVERY):
+        self.path = path
+        self.flush_every = flush_every
+        self.records = {}  # input mapped to its latest record
+        self.buffer = []
+        if os.path.exists(path):
+            with open(path, 'rb+') as f:
+                data = f.read()
+                if data and not data.endswith(b'\n'):
+                    # Drop a torn last line, so new records start on a line of their own.
+                    data = data[:data.rfind(b'\n') + 1]
+                    f.truncate(len(data))
+            for line in data.decode('utf-8').splitlines():
+                record = json.loads(line)
+                self.records[record['input']] = record
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def status(self, input_id):
+        """
+        Returns the latest status of an input, or None if it has no record.
+        """
+        record = self.records.get(input_id)
+        return None if record is None else record['status']
+
+    def pending(self, inputs, retry_failed=False):
+        """
+        Returns the inputs, in the given order, that have no record yet
+        (or whose latest record is a failure, if retry_failed is True).
+        """
+        redo = {FAILED} if retry_failed else set()
+        return [i for i in inputs if i not in self.records or self.records[i]['status'] in redo]
+
+    def record(self, input_id, status, reason=None, output=None):
+        assert(status in STATUSES)
+        record = {'input': input_id, 'status': status, 'reason': reason,
+                  'output': output, 'time': time.time()}
+        self.records[input_id] = record
+        self.buffer.append(record)
+        if len(self.buffer) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        """
+        Appends the buffered records and syncs them to disk.
+        """
+        if not self.buffer:
+            return
+        dir_name = os.path.dirname(self.path)
+        if dir_name:
+            os.makedirs(dir_name, exist_ok=True)
+        with open(self.path, 'a') as f:
+            for record in self.buffer:
+                f.write(json.dumps(record) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        self.buffer = []
+
+    def close(self):
+        self.flush()
+
+    def counts(self):
+        """
+        Returns the number of inputs with each latest status.
+        """
+        return Counter([record['status'] for record in self.records.values()])
@@ -0,0 +1,85 @@
+__author__ = 'Kara Schechtman <kws2121@columbia.edu>, Serina Chang <sc3003@columbia.edu>'
+__date__ = 'Oct 19, 2026'
+
+from concurrent.futures import ThreadPoolExecutor
+from http_cache import CacheMiss, HttpCache
+import requests
+from requests.adapters import HTTPAdapter
+from scheduler import Scheduler
+
+'''Concurrent page fetching over a pooled HTTP session.'''
+
+DEFAULT_CONCURRENCY = 8
+TIMEOUT = 30  # seconds
+
+class Fetcher(object):
+    """
+    Fetches pages over one requests.Session, so connections to a host are
+    kept open and reused, with up to concurrency requests in flight at once.
+    If an HttpCache is given, pages are read from it when cached and saved
+    to it when fetched; in its offline mode, uncached pages raise CacheMiss
+    instead of being fetched. Requests go through a Scheduler, which
+    limits their rate and retries transient failures; fetchers may share
+    one. Use it as a context manager, or call close when done.
+    """
+    def __init__(self, concurrency=DEFAULT_CONCURRENCY, timeout=TIMEOUT, cache=None, scheduler=None):
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.cache = cache
+        self.scheduler = scheduler or Scheduler()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.executor = ThreadPoolExecutor(max_workers=concurrency)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def get(self, url):
+        """
+        Returns the body of the page at url, as bytes.
+        """
+        if self.cache is not None:
+            body = self.cache.get(url)
+            if body is not None:
+                return body
+            if self.cache.offline:
+                raise CacheMiss('Not cached: {}'.format(url))
+        r = self.scheduler.call(url, lambda: self.session.get(url, timeout=self.timeout))
+        if self.cache is not None:
+            self.cache.put(url, r.content, r.status_code)
+        return r.content
+
+    def submit(self, url):
+        """
+        Starts fetching url in the background. Returns a Future of its body.
+        """
+        return self.executor.submit(self.get, url)
+
+    def get_many(self, urls):
+        """
+        Fetches every url concurrently. Returns the bodies in the order of
+        urls; if any request fails, its exception is raised.
+        """
+        return list(self.executor.map(self.get, urls))
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        self.session.close()
+
+_default_fetcher = None
+
+def get_default_fetcher():
+    """
+    Returns a shared Fetcher with the default concurrency and response
+    cache, for callers that are not given one.
+    """
+    global _default_fetcher
+    if _default_fetcher is None:
+        _default_fetcher = Fetcher(cache=HttpCache())
+    return _default_fetcher
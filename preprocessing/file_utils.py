@@ -0,0 +1,44 @@
+__author__ = 'Kara Schechtman <kws2121@columbia.edu>, Serina Chang <sc3003@columbia.edu>'
+__date__ = 'Oct 19, 2026'
+
+import contextlib
+import os
+import stat
+import tempfile
+
+'''File writing helpers shared by the corpus builders.'''
+
+_UMASK = os.umask(0)  # os.umask can only be read by setting it
+os.umask(_UMASK)
+
+@contextlib.contextmanager
+def atomic_write(fn, mode='w', sync=True):
+    """
+    Opens a temporary file next to fn for writing and, once the block
+    finishes without an error, renames it to fn. Readers, and runs that
+    resume after a crash, see either the old file or the whole new one,
+    never a partial file. If the block raises, fn is left untouched.
+    The new file keeps the mode of the one it replaces or, for a new file,
+    gets the mode open() would give it, rather than mkstemp's owner-only 0600.
+    With sync, the file is flushed to disk before the rename; caches that
+    can be rebuilt may skip that.
+    """
+    dir_name = os.path.dirname(fn) or '.'
+    os.makedirs(dir_name, exist_ok=True)
+    fd, tmp_fn = tempfile.mkstemp(dir=dir_name, prefix='.' + os.path.basename(fn), suffix='.tmp')
+    try:
+        try:
+            file_mode = stat.S_IMODE(os.stat(fn).st_mode)
+        except FileNotFoundError:
+            file_mode = 0o666 & ~_UMASK
+        os.fchmod(fd, file_mode)
+        with os.fdopen(fd, mode) as f:
+            yield f
+            if sync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_fn, fn)
+    except BaseException:
+        if os.path.exists(tmp_fn):
+            os.remove(tmp_fn)
+        raise
@@ -0,0 +1,182 @@
+__author__ = 'Kara Schechtman <kws2121@columbia.edu>, Serina Chang <sc3003@columbia.edu>'
+__date__ = 'Oct 19, 2026'
+
+import argparse
+import gzip
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+import random
+import sys
+import threading
+import time
+from urllib.parse import quote, urlsplit
+
+'''Local stand-in for IMDb that serves saved pages, for testing the scrapers offline.
+
+Pages are files in a fixture directory, named after the URL path and query
+(see fixture_filename). Point the scrapers at the server by setting the
+IMDB_DOMAIN environment variable, e.g.
+    python fixture_server.py ../data/fixtures --port 8000 --delay 0.05
+    IMDB_DOMAIN=http://localhost:8000 python make_data.py
+To test retries, the server can also fail a share of requests on purpose:
+    python fixture_server.py ../data/fixtures --error_rate 0.2 --reset_rate 0.05
+Pages a scraper has fetched can be saved as fixtures from its HTTP cache:
+    python fixture_server.py ../data/fixtures --export_from ../data/cache/http/'''
+
+ERROR_STATUSES = (429, 500, 503)
+
+def fixture_filename(path):
+    """
+    Returns the fixture file name for a URL path with its query, e.g.
+    '/title/tt0103074/fullcredits'.
+    """
+    return quote(path, safe='') + '.html'
+
+def save_fixture(fixture_dir, path, content):
+    """
+    Saves the body of the page at path (bytes) as a fixture.
+    """
+    os.makedirs(fixture_dir, exist_ok=True)
+    with open(os.path.join(fixture_dir, fixture_filename(path)), 'wb') as f:
+        f.write(content)
+
+def export_cache_fixtures(cache_path, fixture_dir):
+    """
+    Saves every page in an HttpCache directory that was fetched with status
+    200 as a fixture, under its URL path and query. Returns the number saved.
+    """
+    num_saved = 0
+    for dir_name, _, fns in os.walk(cache_path):
+        for fn in sorted(fns):
+            if not fn.endswith('.json'):
+                continue
+            with open(os.path.join(dir_name, fn), 'r') as f:
+                meta = json.load(f)
+            if meta['status'] != 200:
+                continue
+            url = urlsplit(meta['url'])
+            path = url.path + ('?' + url.query if url.query else '')
+            with gzip.open(os.path.join(dir_name, fn[:-len('.json')] + '.gz'), 'rb') as f:
+                save_fixture(fixture_dir, path, f.read())
+            num_saved += 1
+    return num_saved
+
+class _FixtureHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.request_count += 1
+        if server.delay:
+            time.sleep(server.delay)  # stands in for the round trip to IMDb
+        fault = server.pick_fault()
+        if fault == 'reset':
+            self.close_connection = True
+            self.wfile.flush()
+            self.connection.shutdown(2)  # drop the connection without a response
+            return
+        if fault is not None:
+            self.send_error(fault)
+            return
+        fn = os.path.join(server.fixture_dir, fixture_filename(self.path))
+        if os.path.isfile(fn):
+            with open(fn, 'rb') as f:
+                body = f.read()
+            self.send_response(200)
+        else:
+            body = b'<html><body>Not found</body></html>'
+            self.send_response(404)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            BaseHTTPRequestHandler.log_message(self, format, *args)
+
+class FixtureServer(ThreadingHTTPServer):
+    """
+    Serves the pages in fixture_dir on localhost, each after delay seconds,
+    from a background thread once started. request_count counts the
+    requests received. Use it as a context manager.
+    port=0 picks a free port; url gives the address to use as IMDB_DOMAIN.
+    For fault injection, a share error_rate of requests gets one of
+    error_statuses instead of the page, and a share reset_rate has its
+    connection dropped; fault_count counts both. seed makes them repeatable.
+    """
+    daemon_threads = True
+
+    def __init__(self, fixture_dir, port=0, delay=0.0, verbose=False, error_rate=0.0,
+                 error_statuses=ERROR_STATUSES, reset_rate=0.0, seed=None):
+        ThreadingHTTPServer.__init__(self, ('127.0.0.1', port), _FixtureHandler)
+        self.fixture_dir = fixture_dir
+        self.delay = delay
+        self.verbose = verbose
+        self.error_rate = error_rate
+        self.error_statuses = error_statuses
+        self.reset_rate = reset_rate
+        self.rng = random.Random(seed)
+        self.request_count = 0
+        self.fault_count = 0
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def pick_fault(self):
+        """
+        Returns the status to fail the next request with, 'reset' to drop
+        its connection, or None to serve it.
+        """
+        with self.lock:
+            r = self.rng.random()
+            if r < self.reset_rate:
+                fault = 'reset'
+            elif r < self.reset_rate + self.error_rate:
+                fault = self.rng.choice(self.error_statuses)
+            else:
+                return None
+            self.fault_count += 1
+            return fault
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:{}'.format(self.server_address[1])
+
+    def start(self):
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self.thread is not None:
+            self.thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Serve saved IMDb pages locally.')
+    parser.add_argument('fixture_dir')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--delay', type=float, default=0.0, help='seconds to wait before each response')
+    parser.add_argument('--error_rate', type=float, default=0.0, help='share of requests answered with an error status')
+    parser.add_argument('--reset_rate', type=float, default=0.0, help='share of requests whose connection is dropped')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--export_from', help='HTTP cache directory to save fixtures from, instead of serving')
+    args = parser.parse_args()
+    if args.export_from:
+        print('Saved {} pages to {}'.format(export_cache_fixtures(args.export_from, args.fixture_dir), args.fixture_dir))
+        sys.exit(0)
+    server = FixtureServer(args.fixture_dir, args.port, args.delay, verbose=True, error_rate=args.error_rate,
+                           reset_rate=args.reset_rate, seed=args.seed)
+    print('Serving {} at {}'.format(args.fixture_dir, server.url))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
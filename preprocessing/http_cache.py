@@ -0,0 +1,139 @@
+__author__ = 'Kara Schechtman <kws2121@columbia.edu>, Serina Chang <sc3003@columbia.edu>'
+__date__ = 'Oct 19, 2026'
+
+import gzip
+import hashlib
+import json
+from file_utils import atomic_write
+import os
+import threading
+import time
+
+'''On-disk cache of HTTP responses for the scrapers, keyed by URL.'''
+
+PATH_TO_HTTP_CACHE = '../data/cache/http/'
+MAX_BYTES = 2 * 1024 ** 3
+LOW_WATER = 0.9  # share of max_bytes that eviction trims down to
+CACHED_STATUSES = {200, 404}  # other statuses may be transient, so they are fetched again
+
+class CacheMiss(ValueError):
+    """
+    Raised in offline mode for a URL that is not cached. It is a ValueError
+    so the scrapers skip the movie, as for other failed requests.
+    """
+    pass
+
+class HttpCache(object):
+    """
+    Stores response bodies gzip-compressed, with a JSON file of metadata
+    (URL, status, fetch time and compressed size) next to each, under the
+    SHA-1 of the URL. An entry only exists once its metadata is written.
+    Entries older than ttl seconds count as missing. When the bodies take
+    up more than max_bytes, the least recently used entries are removed
+    until they take up low_water of it, so the directory scan this needs
+    happens once per (1 - low_water) * max_bytes of new pages, not per page.
+    In offline mode, the caller should never go to the network (see
+    Fetcher), so that parsing can be replayed from disk alone.
+    """
+    def __init__(self, path=PATH_TO_HTTP_CACHE, ttl=None, max_bytes=MAX_BYTES, offline=False, low_water=LOW_WATER):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.low_water = low_water
+        self.offline = offline
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self._total_bytes = None  # counted on the first put
+
+    def key(self, url):
+        return hashlib.sha1(url.encode('utf-8')).hexdigest()
+
+    def get(self, url):
+        """
+        Returns the cached body of url as bytes, or None on a miss.
+        """
+        body_fn, meta_fn = self._entry_paths(self.key(url))
+        try:
+            with open(meta_fn, 'r') as f:
+                meta = json.load(f)
+            if self.ttl is not None and time.time() - meta['fetched_at'] > self.ttl:
+                raise IOError('expired')
+            with gzip.open(body_fn, 'rb') as f:
+                body = f.read()
+        except (IOError, OSError, ValueError, KeyError):
+            with self.lock:
+                self.misses += 1
+            return None
+        os.utime(meta_fn)  # marks the entry as recently used
+        with self.lock:
+            self.hits += 1
+        return body
+
+    def put(self, url, body, status=200):
+        """
+        Saves the body of a response if its status is worth caching, then
+        evicts old entries if the cache is over size.
+        """
+        if status not in CACHED_STATUSES:
+            return
+        key = self.key(url)
+        body_fn, meta_fn = self._entry_paths(key)
+        compressed = gzip.compress(body)
+        old_size = os.path.getsize(body_fn) if os.path.exists(body_fn) else 0
+        with atomic_write(body_fn, 'wb', sync=False) as f:
+            f.write(compressed)
+        meta = {'url': url, 'status': status, 'fetched_at': time.time(), 'size': len(compressed)}
+        with atomic_write(meta_fn, sync=False) as f:
+            json.dump(meta, f)
+        with self.lock:
+            if self._total_bytes is not None:
+                self._total_bytes += len(compressed) - old_size
+        if self.max_bytes is not None:
+            self.evict()
+
+    def evict(self):
+        """
+        If the bodies take up more than max_bytes, removes the least recently
+        used entries until they take up at most low_water * max_bytes.
+        """
+        with self.lock:
+            if self._total_bytes is None:
+                self._total_bytes = sum([size for _, size, _ in self._scan()])
+            if self._total_bytes <= self.max_bytes:
+                return
+            target = self.low_water * self.max_bytes
+            for used_at, size, key in sorted(self._scan()):
+                if self._total_bytes <= target:
+                    break
+                for fn in reversed(self._entry_paths(key)):  # metadata first
+                    try:
+                        os.remove(fn)
+                    except OSError:
+                        pass
+                self._total_bytes -= size
+
+    def _scan(self):
+        """
+        Returns (last used, compressed size, key) for every entry.
+        """
+        entries = []
+        if not os.path.isdir(self.path):
+            return entries
+        for sub in os.listdir(self.path):
+            sub_dir = os.path.join(self.path, sub)
+            if not os.path.isdir(sub_dir):
+                continue
+            for fn in os.listdir(sub_dir):
+                if fn.endswith('.json'):
+                    key = fn[:-len('.json')]
+                    body_fn, meta_fn = self._entry_paths(key)
+                    try:
+                        entries.append((os.path.getmtime(meta_fn), os.path.getsize(body_fn), key))
+                    except OSError:
+                        pass
+        return entries
+
+    def _entry_paths(self, key):
+        entry_dir = os.path.join(self.path, key[:2])
+        return os.path.join(entry_dir, key + '.gz'), os.path.join(entry_dir, key + '.json')
@@ -1,16 +1,27 @@
 __author__ = 'Serina Chang <sc3003@columbia.edu>'
 __date__ = 'Jan 20, 2019'
 
-from bs4 import BeautifulSoup
-import json
+import sys
+sys.path.append('..')
+
+from bechdel_index import open_bechdel_index
+from build_journal import BuildJournal, DONE, SKIPPED, FAILED
+from fetch import Fetcher, get_default_fetcher, DEFAULT_CONCURRENCY
+from file_utils import atomic_write
+from http_cache import HttpCache
+from name_normalization import clean_imdb_char_name
 import os
+from page_parsing import parse_page
+from person_cache import PersonGenderCache, get_default_person_cache, person_id_from_url
 import pickle
-import requests
+from scheduler import DEFAULT_RATE, Scheduler
+import shutil
 
 '''Parsing from screenplay'''
 def extract_sp_title_and_char_names(lines):
     """
-    Extracts the title and character names in the screenplay lines.
+    Extracts the title and character names in the screenplay lines, in one pass.
+    lines may be an open screenplay file, which is then read line by line.
     """
     title, char_names = None, set()
     for line in lines:
@@ -24,35 +35,61 @@ def extract_sp_title_and_char_names(lines):
     return title, char_names
 
 '''Parsing from imdb'''
-IMDB_DOMAIN = 'https://www.imdb.com'
+IMDB_DOMAIN = os.environ.get('IMDB_DOMAIN', 'https://www.imdb.com')  # override to scrape a stand-in server
 FEMALE_PRONOUNS = {'she', 'her', 'hers', 'herself'}
 MALE_PRONOUNS = {'he', 'him', 'his', 'himself'}
 
-def find_imdb_match(s_title, s_char_names, top_n=5):
+def fetch_soup(url, fetcher=None, kind=None):
+    """
+    Fetches and parses the page at url. If the kind of page is given (see
+    page_parsing.PAGE_RULES), only the parts its extractors use are parsed.
+    """
+    fetcher = fetcher or get_default_fetcher()
+    return parse_page(fetcher.get(url), kind)
+
+EARLY_STOP_SHARE = 0.5  # of the screenplay's character names; None scores every result
+
+def find_imdb_match(s_title, s_char_names, top_n=5, fetcher=None, early_stop_share=EARLY_STOP_SHARE):
     """
     Finds the IMDb search result that has the highest number of character matches with
-    the character names from the screenplay.
+    the character names from the screenplay; ties go to the higher search result.
+    The result pages are fetched concurrently and scored in search order as they arrive.
+    Once a result matches at least early_stop_share of the screenplay's character
+    names, it is taken as the match and the requests for later results are cancelled.
     """
+    fetcher = fetcher or get_default_fetcher()
     title_toks = s_title.split()
-    search_url = 'https://www.imdb.com/find?q={}&s=tt'.format('+'.join(title_toks))
-    r = requests.get(search_url)
-    soup = BeautifulSoup(r.content, 'html.parser')
-    top_results = soup.find_all('tr', attrs={'class':'findResult'})
-    if len(top_results) > top_n:
-        top_results = top_results[:top_n]
+    search_url = '{}/find?q={}&s=tt'.format(IMDB_DOMAIN, '+'.join(title_toks))
+    search_page = fetch_soup(search_url, fetcher, 'search')
+    result_urls = extract_search_result_urls(search_page, top_n)
+    enough = None if early_stop_share is None else max(1, early_stop_share * len(s_char_names))
+    futures = [fetcher.submit(url) for url in result_urls]
     best_char_match = 0
     best_soup = None
-    for r in top_results:
-        result_url = IMDB_DOMAIN + r.find('a')['href']
-        r = requests.get(result_url)
-        soup = BeautifulSoup(r.content, 'html.parser')
-        i_char_names = extract_imdb_char_names(soup)
-        char_match = compute_char_match(s_char_names, i_char_names)
-        if char_match > best_char_match:
-            best_char_match = char_match
-            best_soup = soup
+    try:
+        for future in futures:
+            soup = parse_page(future.result(), 'title')
+            i_char_names = extract_imdb_char_names(soup)
+            char_match = compute_char_match(s_char_names, i_char_names)
+            if char_match > best_char_match:
+                best_char_match = char_match
+                best_soup = soup
+                if enough is not None and char_match >= enough:
+                    break
+    finally:
+        for future in futures:
+            future.cancel()  # only cancels requests that have not started
     return best_soup
 
+def extract_search_result_urls(search_page, top_n=5):
+    """
+    Extracts the URLs of the top results from an IMDb title search page.
+    """
+    top_results = search_page.find_all('tr', attrs={'class':'findResult'})
+    if len(top_results) > top_n:
+        top_results = top_results[:top_n]
+    return [IMDB_DOMAIN + r.find('a')['href'] for r in top_results]
+
 def extract_imdb_char_names(main_page):
     """
     Extracts character names from the main IMDb page for the movie.
@@ -69,12 +106,7 @@ def clean_char_name_text(text):
     """
     Cleans a character name extracted from the main IMDb page for the movie.
     """
-    text = text.replace(',', '')  # strip commas
-    char_names = text.split('/')  # sometimes a row lists multiple character names
-    cleaned_names = []
-    for cn in char_names:
-        cleaned_names.append(cn.split('(')[0].strip())
-    return '/'.join(cleaned_names)
+    return clean_imdb_char_name(text)
 
 def compute_char_match(s_char_names, i_char_names):
     """
@@ -136,15 +168,51 @@ def make_full_credits_url(imdb_id):
     """
     return '{}/title/tt{}/fullcredits'.format(IMDB_DOMAIN, imdb_id)
 
-def extract_credits(credits_page):
+def extract_credits(credits_page, fetcher=None, person_cache=None):
     """
     Extracts the full list of director and cast credits from the
     IMDb full credits page of the movie.
     director tuples: < director name, director gender >
     cast tuples: < character name, actor name, actor gender >
+    Genders are looked up in the PersonGenderCache first; the bio pages
+    of the other directors and actors are fetched concurrently and their
+    genders added to the cache, which the caller saves.
     """
-    dir_tuples = []
-    char_tuples = []
+    fetcher = fetcher or get_default_fetcher()
+    person_cache = person_cache or get_default_person_cache()
+    dir_rows, char_rows = extract_credit_rows(credits_page)
+    bio_urls = [bio_url for _, bio_url in dir_rows] + [bio_url for _, _, bio_url in char_rows]
+    url_to_gender = {}
+    to_fetch = []
+    for bio_url in bio_urls:
+        if bio_url in url_to_gender:
+            continue
+        person_id = person_id_from_url(bio_url)
+        found, gender = person_cache.lookup(person_id) if person_id else (False, None)
+        url_to_gender[bio_url] = gender
+        if not found:
+            to_fetch.append(bio_url)
+    for bio_url, content in zip(to_fetch, fetcher.get_many(to_fetch)):
+        gender = predict_gender_from_bio(parse_page(content, 'bio'))
+        url_to_gender[bio_url] = gender
+        person_id = person_id_from_url(bio_url)
+        if person_id:
+            person_cache.put(person_id, gender)
+    genders = [url_to_gender[bio_url] for bio_url in bio_urls]
+    dir_tuples = [(name, gender) for (name, _), gender in zip(dir_rows, genders)]
+    char_tuples = [(char_name, act_name, gender) for (char_name, act_name, _), gender
+                   in zip(char_rows, genders[len(dir_rows):])]
+    return dir_tuples, char_tuples
+
+def extract_credit_rows(credits_page):
+    """
+    Extracts the directors and cast from the IMDb full credits page of
+    the movie, with the URLs of their bio pages.
+    director rows: < director name, bio url >
+    cast rows: < character name, actor name, bio url >
+    """
+    dir_rows = []
+    char_rows = []
     headers = credits_page.find_all('h4', attrs={'class':'dataHeaderWithBorder'})
     tables = credits_page.find_all('table', attrs={'class':'simpleTable simpleCreditsTable'})
     for h, t in zip(headers, tables):
@@ -152,9 +220,7 @@ def extract_credits(credits_page):
             for name_item in t.find_all('td', attrs={'class':'name'}):
                 name = name_item.text.strip()
                 bio_url = IMDB_DOMAIN + name_item.find('a')['href']
-                bio_soup = BeautifulSoup(requests.get(bio_url).content, 'html.parser')
-                gender = predict_gender_from_bio(bio_soup)
-                dir_tuples.append((name, gender))
+                dir_rows.append((name, bio_url))
             break
     cast_table = credits_page.find('table', attrs={'class':'cast_list'})
     if cast_table is not None:
@@ -164,10 +230,8 @@ def extract_credits(credits_page):
                 act_name = actor.text.strip()
                 char_name = clean_char_name_text(character.text)
                 bio_url = IMDB_DOMAIN + photo.find('a')['href']
-                bio_soup = BeautifulSoup(requests.get(bio_url).content, 'html.parser')
-                gender = predict_gender_from_bio(bio_soup)
-                char_tuples.append((char_name, act_name, gender))
-    return dir_tuples, char_tuples
+                char_rows.append((char_name, act_name, bio_url))
+    return dir_rows, char_rows
 
 def predict_gender_from_bio(bio_page):
     """
@@ -199,84 +263,127 @@ def predict_gender_from_bio(bio_page):
     return None
 
 '''Bechdel functions'''
-PATH_TO_BECHDEL = '../data/bechdel/bechdel_20190124.json'
-
 def make_bechdel_dict():
     """
-    Makes a dictionary of IMDb ID mapped to Bechdel rating.
+    Returns a mapping of IMDb ID to Bechdel rating (a BechdelIndex, which
+    has the dict's get), indexing the newest bechdeltest.com dump first if
+    it has not been indexed yet. Close it when done, or use it as a context
+    manager.
     """
-    bechdel_json = json.load(open(PATH_TO_BECHDEL, 'r'))
-    bechdel_dict = {}
-    for entry in bechdel_json:
-        bechdel_dict[str(entry['imdbid'])] = str(entry['rating'])
-    return bechdel_dict
+    return open_bechdel_index()
 
 '''Write to file'''
 PATH_TO_SCREENPLAYS = './data/agarwal_screenplays/'
-PATH_TO_SKIPPED = './data/skipped.pkl'
+PATH_TO_JOURNAL = './data/build_journal.jsonl'
+PATH_TO_SKIPPED = './data/skipped.pkl'  # kept by builds from before the journal
 PATH_TO_DATA = './data/data_with_screenplays/'
 
-def convert_screenplays_to_dl_files(continue_work=True, max_files=None):
+def convert_screenplays_to_dl_files(continue_work=True, max_files=None, concurrency=DEFAULT_CONCURRENCY,
+                                    person_ttl=None, offline=False, retry_failed=False, rate=DEFAULT_RATE):
     """
     For each screenplay in the original Agarwal dataset, this function tries to create
     a new text file that includes metadata pulled from IMDb and bechdeltest.com,
     followed by the original screenplay. From IMDb, the metadata consists of: ID, title,
     year, genres, director(s)/gender(s), movie rating, and characters/actors/genders,
     and from bechdeltest.com, we find the Bechdel score if applicable.
-    The creation of the new file fails if:
+    The creation of the new file is skipped if:
     (1) no title or character name can be extracted from the original screenplay;
     (2) no IMDb match is found for the screenplay's extracted title + character names;
-    (3) some ValueError occurs while making requests and parsing IMDb pages.
-    """
-    screenplay_files = os.listdir(PATH_TO_SCREENPLAYS)
-    if continue_work:
-        skipped = pickle.load(open(PATH_TO_SKIPPED, 'rb'))
-        processed_before = len(os.listdir(PATH_TO_DATA)) + len(skipped)
-        print('Processed {} screenplays before'.format(processed_before))
-        screenplay_files = screenplay_files[processed_before:]
-    else:
-        skipped = set()
-    if max_files is not None and len(screenplay_files) > max_files:
-        screenplay_files = screenplay_files[:max_files]
-    print('Processing {} screenplays...'.format(len(screenplay_files)))
-    bechdel_dict = make_bechdel_dict()
-    for s_fn in screenplay_files:
-        with open(PATH_TO_SCREENPLAYS + s_fn, 'r') as s_file:
-            try:
-                s_lines = s_file.readlines()
-                s_title, s_char_names = extract_sp_title_and_char_names(s_lines)
-                if len(s_title) == 0:
-                    print('Missing title for', s_fn)
-                    skipped.add(s_fn)
-                elif len(s_char_names) == 0:
-                    print('Missing character names for', s_title.upper())
-                    skipped.add(s_fn)
-                else:
-                    soup = find_imdb_match(s_title, s_char_names)
-                    if soup is None:
-                        print('Could not find IMDb match for', s_title.upper())
-                        skipped.add(s_fn)
-                    else:
-                        print('Success: making DataLoader file for', s_title.upper())
-                        ID = extract_imdb_id(soup)
-                        title, year, genres = extract_imdb_headings(soup)
-                        rating = extract_imdb_rating(soup)
-                        credits_url = make_full_credits_url(ID)
-                        credits_page = BeautifulSoup(requests.get(credits_url).content, 'html.parser')
-                        dir_tuples, char_tuples = extract_credits(credits_page)
-                        bechdel_score = bechdel_dict.get(ID)
-                        metadata = format_metadata(ID, title, year, genres, rating, dir_tuples, char_tuples, bechdel_score)
-                        new_fn = PATH_TO_DATA + '{}___{}.txt'.format('_'.join(title.split()), year)
-                        with open(new_fn, 'w') as new_f:
-                            new_f.write(metadata)
-                            new_f.write('\n')
-                            for line in s_lines:
-                                new_f.write(line)
-            except ValueError:
-                print('ValueError:', s_fn)
-                skipped.add(s_fn)
-            pickle.dump(skipped, open(PATH_TO_SKIPPED, 'wb'))
-    print('Progress: {} successful, {} skipped'.format(len(os.listdir(PATH_TO_DATA)), len(skipped)))
+    and fails if (3) some ValueError occurs while making requests and parsing IMDb pages.
+    The outcome for each screenplay is recorded in the build journal; with continue_work,
+    screenplays that already have an outcome are not processed again (except failed
+    ones, if retry_failed is True). Output files are written atomically.
+    A corpus built before the journal existed is taken over from skipped.pkl
+    on the first run (see _seed_journal), so it is not built again.
+    Up to concurrency IMDb pages are fetched at once. Actor and director genders
+    are cached by person, and fetched again once older than person_ttl seconds.
+    IMDb pages are cached on disk; if offline is True, only cached pages are
+    used, so the corpus can be re-parsed without any requests. At most rate
+    requests are sent per second, and transient failures are retried.
+    """
+    screenplay_files = sorted(os.listdir(PATH_TO_SCREENPLAYS))
+    with BuildJournal(PATH_TO_JOURNAL) as journal:
+        if continue_work:
+            if not journal.records:
+                _seed_journal(journal)
+            pending = journal.pending(screenplay_files, retry_failed)
+            print('Processed {} screenplays before'.format(len(screenplay_files) - len(pending)))
+            screenplay_files = pending
+        if max_files is not None and len(screenplay_files) > max_files:
+            screenplay_files = screenplay_files[:max_files]
+        print('Processing {} screenplays...'.format(len(screenplay_files)))
+        person_cache = PersonGenderCache(ttl=person_ttl)
+        try:
+            with make_bechdel_dict() as bechdel_dict, \
+                 Fetcher(concurrency, cache=HttpCache(offline=offline), scheduler=Scheduler(rate)) as fetcher:
+                for s_fn in screenplay_files:
+                    status, reason, output = _convert_screenplay(s_fn, bechdel_dict, fetcher, person_cache)
+                    journal.record(s_fn, status, reason, output)
+                fetcher.scheduler.metrics.print_summary()
+        finally:
+            person_cache.save()
+        counts = journal.counts()
+    print('Progress: {} successful, {} skipped, {} failed'.format(counts[DONE], counts[SKIPPED], counts[FAILED]))
+
+def _seed_journal(journal):
+    """
+    Records the screenplays a build from before the journal processed, using
+    the resume rule it had: the first (output files + skipped screenplays)
+    screenplays in os.listdir order were processed, and are skipped if listed
+    in skipped.pkl (which also held failures) and done otherwise. Does
+    nothing without skipped.pkl.
+    """
+    if not os.path.exists(PATH_TO_SKIPPED):
+        return
+    with open(PATH_TO_SKIPPED, 'rb') as f:
+        skipped = pickle.load(f)
+    processed_before = len(os.listdir(PATH_TO_DATA)) + len(skipped)
+    for s_fn in os.listdir(PATH_TO_SCREENPLAYS)[:processed_before]:
+        if s_fn in skipped:
+            journal.record(s_fn, SKIPPED, 'skipped before the journal')
+        else:
+            journal.record(s_fn, DONE)
+    journal.flush()
+    print('Took over {} screenplays from {}'.format(len(journal.records), PATH_TO_SKIPPED))
+
+def _convert_screenplay(s_fn, bechdel_dict, fetcher, person_cache):
+    """
+    Makes the DataLoader file for one screenplay. Returns its status for
+    the build journal, the reason if it was skipped or failed, and the
+    output file if it was done.
+    """
+    with open(PATH_TO_SCREENPLAYS + s_fn, 'r') as s_file:
+        try:
+            s_title, s_char_names = extract_sp_title_and_char_names(s_file)
+            if not s_title:
+                print('Missing title for', s_fn)
+                return SKIPPED, 'missing title', None
+            elif len(s_char_names) == 0:
+                print('Missing character names for', s_title.upper())
+                return SKIPPED, 'missing character names', None
+            soup = find_imdb_match(s_title, s_char_names, fetcher=fetcher)
+            if soup is None:
+                print('Could not find IMDb match for', s_title.upper())
+                return SKIPPED, 'no IMDb match', None
+            print('Success: making DataLoader file for', s_title.upper())
+            ID = extract_imdb_id(soup)
+            title, year, genres = extract_imdb_headings(soup)
+            rating = extract_imdb_rating(soup)
+            credits_url = make_full_credits_url(ID)
+            credits_page = fetch_soup(credits_url, fetcher, 'credits')
+            dir_tuples, char_tuples = extract_credits(credits_page, fetcher, person_cache)
+            bechdel_score = bechdel_dict.get(ID)
+            metadata = format_metadata(ID, title, year, genres, rating, dir_tuples, char_tuples, bechdel_score)
+            new_fn = PATH_TO_DATA + '{}___{}.txt'.format('_'.join(title.split()), year)
+            with atomic_write(new_fn) as new_f:
+                new_f.write(metadata)
+                new_f.write('\n')
+                s_file.seek(0)
+                shutil.copyfileobj(s_file, new_f)  # copies in chunks, not the whole screenplay at once
+            return DONE, None, new_fn
+        except ValueError as e:
+            print('ValueError:', s_fn)
+            return FAILED, 'ValueError: {}'.format(e), None
 
 def format_metadata(ID, title, year, genres, rating, dir_tuples, char_tuples, bechdel_score):
     """
@@ -304,23 +411,23 @@ def demo(imdb_movie_url, bechdel_dict):
     """
     Retrieves the metadata for some movie and prints the formatted metadata string.
     """
-    main_page = BeautifulSoup(requests.get(imdb_movie_url).content, 'html.parser')
+    main_page = fetch_soup(imdb_movie_url, kind='title')
     ID = extract_imdb_id(main_page)
     title, year, genres = extract_imdb_headings(main_page)
     rating = extract_imdb_rating(main_page)
     credits_url = make_full_credits_url(ID)
     print(credits_url)
-    credits_page = BeautifulSoup(requests.get(credits_url).content, 'html.parser')
+    credits_page = fetch_soup(credits_url, kind='credits')
     dir_tuples, char_tuples = extract_credits(credits_page)
     bechdel_score = bechdel_dict.get(ID)
     metadata = format_metadata(ID, title, year, genres, rating, dir_tuples, char_tuples, bechdel_score)
     print(metadata)
 
 if __name__ == "__main__":
-    bechdel_dict = make_bechdel_dict()
     # carol_url = 'https://www.imdb.com/title/tt2402927/'
     # bob_url = 'https://www.imdb.com/title/tt0103241/'  # has multiname characters
     thelma_and_louise_url = 'https://www.imdb.com/title/tt0103074/'  # has commas in char names
     # four_rooms_url = 'https://www.imdb.com/title/tt0113101/'  # has multiple directors
-    demo(thelma_and_louise_url, bechdel_dict)
+    with make_bechdel_dict() as bechdel_dict:
+        demo(thelma_and_louise_url, bechdel_dict)
     # convert_screenplays_to_dl_files(continue_work=True)
@@ -1,13 +1,12 @@
 __author__ = 'Serina Chang <sc3003@columbia.edu>'
 __date__ = 'Jan 28, 2019'
 
-from bs4 import BeautifulSoup
 import csv
 from make_data import *
 import os
-import requests
 
 PATH_TO_OSCARS = '../data/oscars/'
+PATH_TO_OSCARS_JOURNAL = PATH_TO_OSCARS + 'build_journal.jsonl'
 IMDB_ID_LENGTH = 7
 
 def pad_id(id):
@@ -32,55 +31,81 @@ def parse_oscars_csv():
             movies.append((name, year, id, won))
     return movies
 
-def get_num_oscars_parsed():
+def make_imdb_url(id):
     """
-    Returns how many data files exist in the corpus already.
+    Creates the IMDb movie page url for movie with the given IMDb id.
     """
-    files = os.listdir(PATH_TO_OSCARS)
-    count = [1 if f.endswith('.txt') else 0 for f in files]
-    return sum(count)
+    return '{}/title/tt{}/'.format(IMDB_DOMAIN, id)
 
-def make_imdb_url(id):
+def _seed_journal(journal):
     """
-    Creates the IMDb movie page url for movie with the given IMDb id.
+    Records as done every movie with a data file in the corpus already, by
+    the IMDb ID on the file's first line.
     """
-    return 'https://www.imdb.com/title/tt{}/'.format(id)
+    for fn in sorted(os.listdir(PATH_TO_OSCARS)):
+        if fn.endswith('.txt'):
+            with open(PATH_TO_OSCARS + fn, 'r') as f:
+                first_line = f.readline()
+            if first_line.startswith('IMDB: '):
+                journal.record(first_line[len('IMDB: '):].strip(), DONE, output=PATH_TO_OSCARS + fn)
+    journal.flush()
+    print('Took over {} Oscar noms from existing files'.format(len(journal.records)))
 
-def make_corpus(max_movies = None, continue_work = True):
+def make_corpus(max_movies = None, continue_work = True, concurrency = DEFAULT_CONCURRENCY, person_ttl = None,
+                offline = False, retry_failed = False, rate = DEFAULT_RATE):
     """
     Primary function. Creates the Oscars metadata corpus by scraping metadata
     from IMDb for each Oscar-nominated movie in the "noms.csv" file.
     Metadata includes title, year, genres, movie rating, director
     names and genders, actor names and genders, and Bechdel score.
+    The outcome for each movie is recorded in the build journal; with continue_work,
+    movies that already have an outcome are not processed again (except failed
+    ones, if retry_failed is True). Output files are written atomically.
+    Files written before the journal existed are taken over on the first run
+    (see _seed_journal), so their movies are not scraped again.
+    Up to concurrency IMDb pages are fetched at once. Actor and director genders
+    are cached by person, and fetched again once older than person_ttl seconds.
+    IMDb pages are cached on disk; if offline is True, only cached pages are used.
+    At most rate requests are sent per second, and transient failures are retried.
     """
-    movies = parse_oscars_csv()
-    if continue_work:
-        processed_before = get_num_oscars_parsed()
-        print('Processed {} Oscar noms before'.format(processed_before))
-        movies = movies[processed_before:]
-    print('Num to process:', len(movies))
-    bechdel_dict = make_bechdel_dict()
-    if max_movies is not None and len(movies) > max_movies:
-        movies = movies[:max_movies]
-    for name, year, id, won in movies:
-        print(name, year)
+    movies = [(name, year, pad_id(id), won) for name, year, id, won in parse_oscars_csv()]
+    with BuildJournal(PATH_TO_OSCARS_JOURNAL) as journal:
+        if continue_work:
+            if not journal.records:
+                _seed_journal(journal)
+            pending = set(journal.pending([id for _, _, id, _ in movies], retry_failed))
+            print('Processed {} Oscar noms before'.format(len(movies) - len(pending)))
+            movies = [movie for movie in movies if movie[2] in pending]
+        print('Num to process:', len(movies))
+        if max_movies is not None and len(movies) > max_movies:
+            movies = movies[:max_movies]
+        person_cache = PersonGenderCache(ttl=person_ttl)
         try:
-            id = pad_id(id)
-            movie_url = make_imdb_url(id)
-            movie_page = BeautifulSoup(requests.get(movie_url).content, 'html.parser')
-            title, year, genres = extract_imdb_headings(movie_page)
-            rating = extract_imdb_rating(movie_page)
-            credits_url = make_full_credits_url(id)
-            credits_page = BeautifulSoup(requests.get(credits_url).content, 'html.parser')
-            dir_tuples, char_tuples = extract_credits(credits_page)
-            bechdel_score = bechdel_dict.get(id)
-            metadata = format_metadata(id, title, year, genres, rating, dir_tuples, char_tuples, bechdel_score)
-            new_fn = PATH_TO_OSCARS + '{}___{}.txt'.format('_'.join(name.split()), year)
-            with open(new_fn, 'w') as f:
-                f.write(metadata)
-                f.write('Oscar Best Picture Winner: {}\n'.format(won))
-        except ValueError:
-            print('ValueError: skipping', name)
+            with make_bechdel_dict() as bechdel_dict, \
+                 Fetcher(concurrency, cache=HttpCache(offline=offline), scheduler=Scheduler(rate)) as fetcher:
+                for name, year, id, won in movies:
+                    print(name, year)
+                    try:
+                        movie_url = make_imdb_url(id)
+                        movie_page = fetch_soup(movie_url, fetcher, 'title')
+                        title, year, genres = extract_imdb_headings(movie_page)
+                        rating = extract_imdb_rating(movie_page)
+                        credits_url = make_full_credits_url(id)
+                        credits_page = fetch_soup(credits_url, fetcher, 'credits')
+                        dir_tuples, char_tuples = extract_credits(credits_page, fetcher, person_cache)
+                        bechdel_score = bechdel_dict.get(id)
+                        metadata = format_metadata(id, title, year, genres, rating, dir_tuples, char_tuples, bechdel_score)
+                        new_fn = PATH_TO_OSCARS + '{}___{}.txt'.format('_'.join(name.split()), year)
+                        with atomic_write(new_fn) as f:
+                            f.write(metadata)
+                            f.write('Oscar Best Picture Winner: {}\n'.format(won))
+                        journal.record(id, DONE, output=new_fn)
+                    except ValueError as e:
+                        print('ValueError: skipping', name)
+                        journal.record(id, FAILED, 'ValueError: {}'.format(e))
+                fetcher.scheduler.metrics.print_summary()
+        finally:
+            person_cache.save()
 
 if __name__ == "__main__":
     make_corpus()
\ No newline at end of file
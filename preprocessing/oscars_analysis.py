@@ -4,7 +4,9 @@ __date__ = 'Feb 01, 2019'
 from data_loader import DataLoader
 import matplotlib.pyplot as plt
 import numpy as np
+import sys
 sys.path.append('..')
+from tracing import span
 
 PATH_TO_OSCARS_CORPUS = './data/oscars/'
 VALID_CATEGORIES = {'year':'Year', 'genre':'Genre', 'dir_gen':'Gender of Director', 'winner':'Oscar Best Picture Results', 'bechdel_pf':'Bechdel P/F', 'bechdel_score':'Bechdel Score'}
@@ -38,6 +40,10 @@ def compute_cast_gender_breakdown(dl, category, top_billed_n=1000):
     e.g. have multiple genres or have a female director and a male director.
     If a category is not specified, the return dictionary is empty.
     """
+    with span('cast_gender_breakdown', category=category, num_movies=len(dl.movies)):
+        return _compute_cast_gender_breakdown(dl, category, top_billed_n)
+
+def _compute_cast_gender_breakdown(dl, category, top_billed_n):
     if category:
         assert(category in VALID_CATEGORIES)
     total_female_ct = 0
@@ -0,0 +1,104 @@
+__author__ = 'Kara Schechtman <kws2121@columbia.edu>, Serina Chang <sc3003@columbia.edu>'
+__date__ = 'Oct 19, 2026'
+
+from bs4 import BeautifulSoup, SoupStrainer
+from bs4.builder import builder_registry
+
+'''Parses IMDb pages into trees holding only the elements the extractors in make_data use.'''
+
+SELECTIVE_PARSING = True  # set to False to parse whole pages with html.parser, as before
+FULL_PARSER = 'html.parser'
+FAST_PARSER = 'lxml' if builder_registry.lookup('lxml') is not None else FULL_PARSER
+
+# Page kind mapped to the (tag, attribute, value) rules of the elements its
+# extractors look for. Each matching element is kept with its whole subtree.
+PAGE_RULES = {
+    'search': [('tr', 'class', 'findResult')],
+    'title': [('meta', 'property', 'pageId'),
+              ('div', 'class', 'title_wrapper'),
+              ('span', 'itemprop', 'ratingValue'),
+              ('td', 'class', 'character')],
+    'credits': [('h4', 'class', 'dataHeaderWithBorder'),
+                ('table', 'class', 'simpleTable simpleCreditsTable'),
+                ('table', 'class', 'cast_list')],
+    'bio': [('div', 'id', 'name-job-categories'),
+            ('div', 'id', 'name-bio-text')],
+}
+
+def page_kind(path):
+    """
+    Guesses the kind of an IMDb page from its URL path, or returns None.
+    """
+    if path.startswith('/find'):
+        return 'search'
+    if path.startswith('/name/'):
+        return 'bio'
+    if path.startswith('/title/'):
+        if 'fullcredits' in path:
+            return 'credits'
+        return 'title'
+    return None
+
+def _matches(rules, name, attrs):
+    for tag, attr, value in rules:
+        if name != tag or attr not in attrs:
+            continue
+        actual = attrs[attr]
+        if attr == 'class':
+            # class may be a list or, while parsing, the raw string.
+            if isinstance(actual, str):
+                actual = actual.split()
+            if set(value.split()) <= set(actual):
+                return True
+        elif actual == value:
+            return True
+    return False
+
+class PageStrainer(SoupStrainer):
+    """
+    Keeps only the elements matching some rules while a page is parsed.
+    Before Beautiful Soup 4.13, a strainer's function is called with the
+    tag name and attributes; since then the parser asks allow_tag_creation
+    instead, and a function is only given the tag name or a Tag. Both
+    are handled here.
+    """
+    def __init__(self, rules):
+        self.rules = rules
+        SoupStrainer.__init__(self, self._match_tag)
+
+    def _match_tag(self, name, attrs=None):
+        if attrs is None:
+            if not hasattr(name, 'attrs'):
+                return False
+            name, attrs = name.name, name.attrs
+        return _matches(self.rules, name, attrs)
+
+    def allow_tag_creation(self, nsprefix, name, attrs):
+        return _matches(self.rules, name, attrs or {})
+
+    def allow_string_creation(self, string):
+        return False
+
+_strainers = {kind: PageStrainer(rules) for kind, rules in PAGE_RULES.items()}
+
+def parse_page(content, kind=None, selective=None):
+    """
+    Primary function. Parses an IMDb page of the given kind (a key of
+    PAGE_RULES) with the fastest parser available, keeping only the
+    elements that the extractors of that kind of page use. Without a kind,
+    or if selective parsing is off, the whole page is parsed with
+    html.parser, as before.
+    """
+    if selective is None:
+        selective = SELECTIVE_PARSING
+    if not selective or kind is None:
+        return BeautifulSoup(content, FULL_PARSER)
+    return BeautifulSoup(content, FAST_PARSER, parse_only=_strainers[kind])
+
+def compare_parses(content, kind, extract_fn):
+    """
+    Runs extract_fn on the whole page and on the selective parse.
+    Returns both results, which should be equal.
+    """
+    return extract_fn(parse_page(content, kind, selective=False)), \
+           extract_fn(parse_page(content, kind, selective=True))
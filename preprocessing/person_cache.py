@@ -0,0 +1,99 @@
+__author__ = 'Kara Schechtman <kws2121@columbia.edu>, Serina Chang <sc3003@columbia.edu>'
+__date__ = 'Oct 19, 2026'
+
+import atexit
+from file_utils import atomic_write
+import json
+import re
+import threading
+import time
+
+'''Persistent cache of the genders predicted from IMDb bio pages, keyed by person ID.'''
+
+PATH_TO_PERSON_CACHE = '../data/cache/person_genders.json'
+PERSON_ID_RE = re.compile(r'/name/(nm\d+)')
+SAVE_EVERY = 500  # new entries
+
+def person_id_from_url(url):
+    """
+    Extracts the IMDb person ID (e.g. 'nm0000123') from a bio URL,
+    or returns None if it has none.
+    """
+    match = PERSON_ID_RE.search(url)
+    if match is None:
+        return None
+    return match.group(1)
+
+class PersonGenderCache(object):
+    """
+    Maps IMDb person IDs to the gender predicted from their bio page
+    ('F', 'M' or None when it could not be told) and the time it was
+    fetched. If ttl (in seconds) is given, older entries count as missing,
+    so they are fetched again. Entries are kept in memory and written to
+    path by save, which put also calls once save_every entries have been
+    added since the last save; callers should save once more when done.
+    """
+    def __init__(self, path=PATH_TO_PERSON_CACHE, ttl=None, save_every=SAVE_EVERY):
+        self.path = path
+        self.ttl = ttl
+        self.save_every = save_every
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.unsaved = 0  # entries added since the last save
+        try:
+            with open(path, 'r') as f:
+                self.entries = json.load(f)
+        except (IOError, ValueError):
+            self.entries = {}
+
+    def __contains__(self, person_id):
+        entry = self.entries.get(person_id)
+        if entry is None:
+            return False
+        return self.ttl is None or time.time() - entry['fetched_at'] <= self.ttl
+
+    def lookup(self, person_id):
+        """
+        Returns (True, gender) if person_id has a fresh entry, and
+        (False, None) otherwise.
+        """
+        with self.lock:
+            if person_id in self:
+                self.hits += 1
+                return True, self.entries[person_id]['gender']
+            self.misses += 1
+            return False, None
+
+    def put(self, person_id, gender):
+        with self.lock:
+            self.entries[person_id] = {'gender': gender, 'fetched_at': time.time()}
+            self.unsaved += 1
+            due = self.save_every is not None and self.unsaved >= self.save_every
+        if due:
+            self.save()
+
+    def save(self):
+        """
+        Writes the cache if it changed, through a temporary file so that a
+        crash never leaves a partial cache behind.
+        """
+        with self.lock:
+            if self.unsaved == 0:
+                return
+            with atomic_write(self.path) as f:
+                json.dump(self.entries, f)
+            self.unsaved = 0
+
+_default_cache = None
+
+def get_default_person_cache():
+    """
+    Returns a shared PersonGenderCache at the default path, without a TTL.
+    It is saved when the program exits.
+    """
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = PersonGenderCache()
+        atexit.register(_default_cache.save)
+    return _default_cache
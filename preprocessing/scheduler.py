@@ -0,0 +1,193 @@
+__author__ = 'Kara Schechtman <kws2121@columbia.edu>, Serina Chang <sc3003@columbia.edu>'
+__date__ = 'Oct 19, 2026'
+
+from contextlib import contextmanager
+import random
+import requests
+import threading
+import time
+from urllib.parse import urlsplit
+
+'''Rate limiting, per-host concurrency limits and retries for the scrapers' requests.'''
+
+DEFAULT_RATE = 10.0  # requests per second, across all hosts
+DEFAULT_BURST = 10  # requests
+DEFAULT_PER_HOST = 8  # requests in flight per host
+MAX_RETRIES = 4
+BACKOFF_BASE = 0.5  # seconds
+BACKOFF_MAX = 30.0  # seconds
+TRANSIENT_STATUSES = {429, 500, 502, 503, 504}
+TRANSIENT_ERRORS = (requests.ConnectionError, requests.Timeout)
+
+class RetriesExhausted(ValueError):
+    """
+    Raised when a request still fails after every retry. It is a
+    ValueError, so the corpus builders record the movie as failed and
+    move on, like any other movie they cannot parse.
+    """
+    pass
+
+class TokenBucket(object):
+    """
+    Lets through rate requests per second on average, and up to burst at
+    once after a pause. acquire blocks until the caller may go ahead.
+    A rate of None lets everything through.
+    """
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Takes a token, waiting for one if there are none left. Returns how
+        long it waited, in seconds.
+        """
+        if self.rate is None:
+            return 0.0
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            # Reserve the token now and wait for it outside the lock, so
+            # waiting callers are let through in the order they came.
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+def _percentile(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+class SchedulerMetrics(object):
+    """
+    Counts requests, attempts, retries and failures, and keeps the queue
+    depth (requests waiting for a host slot or a token), the time spent
+    queued and the latency of each attempt.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.attempts = 0
+        self.retries = 0
+        self.failures = 0
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.queue_waits = []
+        self.latencies = []
+
+    def enqueue(self):
+        with self.lock:
+            self.queue_depth += 1
+            self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+
+    def dequeue(self, waited):
+        with self.lock:
+            self.queue_depth -= 1
+            self.queue_waits.append(waited)
+
+    def add_attempt(self, latency, retried):
+        with self.lock:
+            self.attempts += 1
+            self.latencies.append(latency)
+            if retried:
+                self.retries += 1
+
+    def summary(self):
+        """
+        Returns the counts and the median and 95th percentile queue wait
+        and latency, in seconds.
+        """
+        with self.lock:
+            return {'requests': self.requests, 'attempts': self.attempts, 'retries': self.retries,
+                    'failures': self.failures, 'queue_depth': self.queue_depth,
+                    'max_queue_depth': self.max_queue_depth,
+                    'queue_wait_p50': _percentile(self.queue_waits, .5),
+                    'queue_wait_p95': _percentile(self.queue_waits, .95),
+                    'latency_p50': _percentile(self.latencies, .5),
+                    'latency_p95': _percentile(self.latencies, .95)}
+
+    def print_summary(self):
+        s = self.summary()
+        print('Requests: {} ({} attempts, {} retries, {} failed)'.format(
+            s['requests'], s['attempts'], s['retries'], s['failures']))
+        print('Queue: max depth {}, wait p50 {:.3f}s, p95 {:.3f}s'.format(
+            s['max_queue_depth'], s['queue_wait_p50'], s['queue_wait_p95']))
+        print('Latency: p50 {:.3f}s, p95 {:.3f}s'.format(s['latency_p50'], s['latency_p95']))
+
+class Scheduler(object):
+    """
+    Sends requests under a token bucket shared by all hosts and at most
+    per_host requests in flight to each host. A request that fails with a
+    connection error, a timeout or a transient status (429 or 5xx) is
+    retried up to max_retries times, after an exponential backoff with
+    full jitter, or after the server's Retry-After if it gives one. Once
+    the retries are used up, RetriesExhausted is raised. Safe to share
+    between threads and fetchers.
+    """
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST, per_host=DEFAULT_PER_HOST,
+                 max_retries=MAX_RETRIES, backoff_base=BACKOFF_BASE, backoff_max=BACKOFF_MAX):
+        self.bucket = TokenBucket(rate, burst)
+        self.per_host = per_host
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.metrics = SchedulerMetrics()
+        self.host_slots = {}
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def _host_slot(self, host):
+        with self.lock:
+            if host not in self.host_slots:
+                self.host_slots[host] = threading.BoundedSemaphore(self.per_host)
+            slot = self.host_slots[host]
+        with slot:
+            yield
+
+    def backoff(self, attempt, response=None):
+        """
+        Returns how long to wait before retry number attempt + 1.
+        """
+        if response is not None:
+            retry_after = response.headers.get('Retry-After', '')
+            if retry_after.isdigit():
+                return min(self.backoff_max, float(retry_after))
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def call(self, url, send):
+        """
+        Primary function. Calls send(), which should request url and return
+        the response, when the rate and host limits allow it, retrying
+        transient failures. Returns the response.
+        """
+        host = urlsplit(url).netloc
+        with self.metrics.lock:
+            self.metrics.requests += 1
+        for attempt in range(self.max_retries + 1):
+            self.metrics.enqueue()
+            queued = time.monotonic()
+            with self._host_slot(host):
+                self.bucket.acquire()
+                self.metrics.dequeue(time.monotonic() - queued)
+                start = time.monotonic()
+                response, error = None, None
+                try:
+                    response = send()
+                except TRANSIENT_ERRORS as e:
+                    error = e
+                self.metrics.add_attempt(time.monotonic() - start, attempt > 0)
+            if error is None and response.status_code not in TRANSIENT_STATUSES:
+                return response
+            if attempt < self.max_retries:
+                time.sleep(self.backoff(attempt, response))
+        with self.metrics.lock:
+            self.metrics.failures += 1
+        reason = error if error is not None else 'status {}'.format(response.status_code)
+        raise RetriesExhausted('Gave up on {} after {} attempts: {}'.format(url, self.max_retries + 1, reason))
@@ -0,0 +1,292 @@
+__author__ = 'Kara Schechtman <kws2121@columbia.edu>, Serina Chang <sc3003@columbia.edu>'
+__date__ = 'Oct 19, 2026'
+
+import argparse
+import os
+import random
+
+'''Generates synthetic corpora in the DataLoader format, with matching SSA and gold label files.'''
+
+MOVIES_DIR = 'movies'
+SSA_DIR = 'ssa_names_1880_2017'
+GOLD_LABELS_DIR = 'gold_labels'
+SSA_MIN = 1880
+SSA_MAX = 2017
+
+FEMALE_NAMES = ['mary', 'patricia', 'linda', 'barbara', 'susan', 'jessica', 'sarah', 'karen',
+                'nancy', 'lisa', 'betty', 'sandra', 'ashley', 'donna', 'carol', 'michelle',
+                'emily', 'amanda', 'melissa', 'deborah', 'laura', 'rebecca', 'sharon', 'cynthia']
+MALE_NAMES = ['james', 'john', 'robert', 'michael', 'william', 'david', 'richard', 'joseph',
+              'thomas', 'charles', 'daniel', 'matthew', 'anthony', 'mark', 'paul', 'steven',
+              'andrew', 'kenneth', 'joshua', 'kevin', 'brian', 'george', 'edward', 'ronald']
+UNISEX_NAMES = ['taylor', 'jordan', 'casey', 'jamie', 'riley', 'alex', 'morgan', 'robin']
+SURNAMES = ['smith', 'johnson', 'williams', 'brown', 'jones', 'garcia', 'miller', 'davis',
+            'rodriguez', 'martinez', 'wilson', 'anderson', 'taylor', 'thomas', 'moore', 'jackson']
+ROLES = {'cop': None, 'doctor': None, 'bartender': None, 'guard': None, 'driver': None,
+         'nurse': None, 'reporter': None, 'girl': 'F', 'woman': 'F', 'mother': 'F',
+         'boy': 'M', 'man': 'M', 'father': 'M'}
+
+GENRE_WEIGHTS = {'Drama': 30, 'Comedy': 20, 'Thriller': 12, 'Action': 12, 'Romance': 10,
+                 'Crime': 8, 'Horror': 5, 'Sci-Fi': 5, 'Fantasy': 4, 'Animation': 2}
+DECADE_WEIGHTS = {1930: 1, 1940: 2, 1950: 3, 1960: 4, 1970: 6, 1980: 10, 1990: 20, 2000: 25, 2010: 15}
+
+DEFAULTS = {
+    'num_movies': 100,
+    'cast_size': (15, 40),        # range of IMDb cast sizes
+    'script_share': 0.6,          # share of the IMDb cast that speaks in the script
+    'uncredited_chars': (0, 5),   # range of script characters that are not in the IMDb cast
+    'dup_name_rate': 0.05,        # chance a cast entry reuses an earlier character name
+    'and_name_rate': 0.02,        # chance a script character is 'x and y'
+    'slash_name_rate': 0.02,      # chance a cast entry is 'x/y'
+    'lines_per_char': 20,         # mean number of lines per character
+    'words_per_line': 12,         # mean number of words per line
+    'missing_rate': 0.05,         # chance each optional metadata field is None / N/A
+    'missing_cast_rate': 0.0,     # chance the IMDb cast is missing
+    'oscar_rate': 0.0,            # share of movies with an Oscar Best Picture line
+    'unknown_gender_rate': 0.05,  # share of cast genders written as '?'
+    'gold_share': 0.1,            # share of movies with a gold label file
+    'aligned_share': 0.5,         # share of gold label files in the ALIGNED format
+    'genre_weights': GENRE_WEIGHTS,
+    'decade_weights': DECADE_WEIGHTS,
+}
+
+# ----------------------- NAMES -----------------------
+def _person_name(rng):
+    """
+    Returns a first name and the gender it is usually given to.
+    """
+    r = rng.random()
+    if r < 0.45:
+        return rng.choice(FEMALE_NAMES), 'F'
+    if r < 0.9:
+        return rng.choice(MALE_NAMES), 'M'
+    return rng.choice(UNISEX_NAMES), rng.choice('FM')
+
+def _character(rng):
+    """
+    Returns an IMDb character name and the gender of the character.
+    """
+    if rng.random() < 0.2:
+        role = rng.choice(sorted(ROLES))
+        return role, ROLES[role] or rng.choice('FM')
+    first, gen = _person_name(rng)
+    if rng.random() < 0.5:
+        return '{} {}'.format(first, rng.choice(SURNAMES)), gen
+    return first, gen
+
+def _weighted_choice(rng, weights):
+    keys = sorted(weights)
+    return rng.choices(keys, weights=[weights[k] for k in keys])[0]
+
+def _line_data(rng, lines_per_char, words_per_line):
+    num_lines = max(1, int(rng.expovariate(1 / lines_per_char)))
+    return [max(1, int(rng.expovariate(1 / words_per_line))) for _ in range(num_lines)]
+
+# ----------------------- MOVIES -----------------------
+def make_movie_record(rng, idx, params):
+    """
+    Makes the content of one synthetic movie as a dictionary: metadata,
+    the IMDb cast as (character, actor, gender) tuples, the script
+    characters with their line data, and gold labels for them, with the
+    IMDb character names each was made from for the ALIGNED format.
+    """
+    p = dict(DEFAULTS, **params)
+    decade = _weighted_choice(rng, p['decade_weights'])
+    year = decade + rng.randint(0, 9)
+    genres = set()
+    for _ in range(rng.randint(1, 3)):
+        genres.add(_weighted_choice(rng, p['genre_weights']))
+
+    # IMDb cast, possibly with duplicate and multi-name characters.
+    cast = []
+    genders = {}
+    for i in range(rng.randint(*p['cast_size'])):
+        if cast and rng.random() < p['dup_name_rate']:
+            char_name = rng.choice(cast)[0]
+            gen = genders[char_name]
+        elif rng.random() < p['slash_name_rate']:
+            (name_a, gen), (name_b, _) = _character(rng), _character(rng)
+            char_name = '{}/{}'.format(name_a, name_b)
+            genders.setdefault(name_a, gen)
+        else:
+            char_name, gen = _character(rng)
+        genders.setdefault(char_name, gen)
+        written_gen = '?' if rng.random() < p['unknown_gender_rate'] else gen
+        actor = '{} {} {}'.format(rng.choice(FEMALE_NAMES if gen == 'F' else MALE_NAMES),
+                                  rng.choice(SURNAMES), i)
+        cast.append((char_name, actor, written_gen))
+
+    # Script characters: a share of the cast, plus some that IMDb lacks.
+    script_names = []
+    for char_name, _, _ in cast:
+        if char_name not in script_names and rng.random() < p['script_share']:
+            script_names.append(char_name.split('/')[0])
+    for _ in range(rng.randint(*p['uncredited_chars'])):
+        char_name, gen = _character(rng)
+        genders.setdefault(char_name, gen)
+        script_names.append(char_name)
+    and_names = {}
+    if len(script_names) >= 2 and rng.random() < p['and_name_rate'] * len(script_names):
+        name_a, name_b = rng.sample(script_names, 2)
+        script_names.append('{} and {}'.format(name_a, name_b))
+        and_names[script_names[-1]] = (name_a, name_b)
+        genders[script_names[-1]] = genders[name_a] if genders[name_a] == genders[name_b] else 'BOTH'
+    characters = []
+    seen = set()
+    for sname in script_names:
+        if sname not in seen:
+            seen.add(sname)
+            characters.append((sname, _line_data(rng, p['lines_per_char'], p['words_per_line'])))
+    alignments = {}  # script name mapped to the IMDb character names it was made from
+    for sname, _ in characters:
+        inames = []
+        for part in and_names.get(sname, (sname,)):
+            for char_name, _, _ in cast:
+                if (char_name == part or char_name.split('/')[0] == part) and char_name not in inames:
+                    inames.append(char_name)
+        alignments[sname] = inames
+
+    def maybe(value):
+        return None if rng.random() < p['missing_rate'] else value
+    directors = []
+    for _ in range(2 if rng.random() < 0.05 else 1):
+        first, gen = _person_name(rng)
+        directors.append('{} {} ({})'.format(first, rng.choice(SURNAMES), gen))
+    return {'imdb': '{:07d}'.format(idx),
+            'title': 'Synthetic Movie {}'.format(idx) if idx % 7 else 'The Director\'s Cut {}'.format(idx),
+            'year': maybe(year),
+            'genre': maybe(sorted(genres)),
+            'director': maybe(', '.join(directors)),
+            'rating': maybe(round(rng.uniform(1, 10), 1)),
+            'bechdel_score': maybe(rng.randint(0, 3)),
+            'imdb_cast': None if rng.random() < p['missing_cast_rate'] else cast,
+            'oscar_winner': (rng.random() < 0.2) if rng.random() < p['oscar_rate'] else None,
+            'characters': characters,
+            'gold': [(sname, genders.get(sname, 'UNK')) for sname, _ in characters],
+            'gold_alignments': alignments,
+            'and_names': sorted(and_names)}
+
+def format_movie_file(record):
+    """
+    Renders a movie record in the DataLoader text format.
+    """
+    def field(value):
+        if value is None:
+            return 'None'
+        if isinstance(value, list):
+            return ', '.join(value)
+        return str(value)
+    cast = None
+    if record['imdb_cast'] is not None:
+        cast = ['{} | {} ({})'.format(c, a, g) for c, a, g in record['imdb_cast']]
+    lines = ['IMDB: {}'.format(record['imdb']),
+             'Title: {}'.format(record['title']),
+             'Year: {}'.format(field(record['year'])),
+             'Genre: {}'.format(field(record['genre'])),
+             'Director: {}'.format(field(record['director'])),
+             'Rating: {}'.format(field(record['rating'])),
+             'Bechdel score: {}'.format('N/A' if record['bechdel_score'] is None else record['bechdel_score']),
+             'IMDB Cast: {}'.format(field(cast))]
+    if record['oscar_winner'] is None:
+        lines.append('')
+    else:
+        lines.append('Oscar Best Picture Winner: {}'.format(record['oscar_winner']))
+    for sname, line_data in record['characters']:
+        lines.append('{}: {}'.format(sname, ', '.join([str(n) for n in line_data])))
+    return '\n'.join(lines) + '\n'
+
+def format_gold_file(record, aligned=False):
+    """
+    Renders the gold labels of a movie in the GENDERED format or, if aligned,
+    the ALIGNED format: "sname (G) -> iname", with a comma-separated list for
+    several IMDb characters, "POSSIBILITIES ..." when a script name matches
+    more than one and "N/A" when it matches none.
+    """
+    if not aligned:
+        return ''.join(['{} ({})\n'.format(sname, gen) for sname, gen in record['gold']])
+    lines = []
+    for sname, gen in record['gold']:
+        inames = record['gold_alignments'][sname]
+        if not inames:
+            alignment = 'N/A'
+        elif sname not in record['and_names'] and len(inames) > 1:
+            alignment = 'POSSIBILITIES ' + ', '.join(inames)
+        else:
+            alignment = ', '.join(inames)
+        lines.append('{} ({}) -> {}\n'.format(sname, gen, alignment))
+    return ''.join(lines)
+
+# ----------------------- SSA -----------------------
+def write_ssa_files(ssa_dir, seed=0, first_year=SSA_MIN, last_year=SSA_MAX):
+    """
+    Writes yob<year>.txt files in the SSA format (name,sex,count), where each
+    name is mostly, but not only, given to babies of its usual gender.
+    """
+    rng = random.Random(seed)
+    os.makedirs(ssa_dir, exist_ok=True)
+    share_female = {}
+    for name in FEMALE_NAMES:
+        share_female[name] = rng.uniform(0.9, 1.0)
+    for name in MALE_NAMES:
+        share_female[name] = rng.uniform(0.0, 0.1)
+    for name in UNISEX_NAMES + SURNAMES:
+        share_female.setdefault(name, rng.uniform(0.2, 0.8))
+    for year in range(first_year, last_year + 1):
+        with open(os.path.join(ssa_dir, 'yob{}.txt'.format(year)), 'w') as f:
+            for name in sorted(share_female):
+                total = rng.randint(5, 5000)
+                num_female = int(round(total * share_female[name]))
+                if num_female > 0:
+                    f.write('{},F,{}\n'.format(name.capitalize(), num_female))
+                if total - num_female > 0:
+                    f.write('{},M,{}\n'.format(name.capitalize(), total - num_female))
+
+# ----------------------- CORPUS -----------------------
+def generate_corpus(out_dir, seed=0, ssa=True, **params):
+    """
+    Primary function. Writes a synthetic corpus laid out like ./data/:
+    movie files in movies/, SSA files in ssa_names_1880_2017/ and gold
+    label files, in the GENDERED or ALIGNED format, for a share of the
+    movies in gold_labels/. params override
+    DEFAULTS. The same seed and parameters always give the same corpus.
+    Returns the number of movies written.
+    """
+    p = dict(DEFAULTS, **params)
+    rng = random.Random(seed)
+    movies_dir = os.path.join(out_dir, MOVIES_DIR)
+    gold_dir = os.path.join(out_dir, GOLD_LABELS_DIR)
+    os.makedirs(movies_dir, exist_ok=True)
+    os.makedirs(gold_dir, exist_ok=True)
+    for idx in range(p['num_movies']):
+        record = make_movie_record(rng, idx, p)
+        with open(os.path.join(movies_dir, '{}.txt'.format(record['imdb'])), 'w') as f:
+            f.write(format_movie_file(record))
+        r = rng.random()
+        if r < p['gold_share']:
+            aligned = r < p['gold_share'] * p['aligned_share']  # reuses the draw, so the movies stay the same
+            gold_fn = '{} {}.txt'.format(record['title'].replace('\'', '_'), 'ALIGNED' if aligned else 'GENDERED')
+            with open(os.path.join(gold_dir, gold_fn), 'w') as f:
+                f.write(format_gold_file(record, aligned))
+    if ssa:
+        write_ssa_files(os.path.join(out_dir, SSA_DIR), seed)
+    return p['num_movies']
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Generate a synthetic corpus in the DataLoader format.')
+    parser.add_argument('out_dir')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no_ssa', action='store_true', help='do not write SSA files')
+    for name, value in sorted(DEFAULTS.items()):
+        if isinstance(value, dict):
+            continue
+        if isinstance(value, tuple):
+            parser.add_argument('--' + name, type=int, nargs=2, default=value)
+        else:
+            parser.add_argument('--' + name, type=type(value), default=value)
+    args = vars(parser.parse_args())
+    out_dir = args.pop('out_dir')
+    seed = args.pop('seed')
+    ssa = not args.pop('no_ssa')
+    args = {name: tuple(value) if isinstance(value, list) else value for name, value in args.items()}
+    num_movies = generate_corpus(out_dir, seed, ssa, **args)
+    print('Wrote {} synthetic movies to {}'.format(num_movies, out_dir))
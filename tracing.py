@@ -0,0 +1,170 @@
+__author__ = 'Kara Schechtman <kws2121@columbia.edu>, Serina Chang <sc3003@columbia.edu>'
+__date__ = 'Oct 19, 2026'
+
+import atexit
+from collections import defaultdict
+import json
+import os
+import threading
+import time
+
+'''Opt-in nested timing spans, written out as a Chrome trace.
+
+Wrap a stage in `with span('name', movie=movie.title, ...):` to time it.
+Tracing is off unless enable() is called or the GIF_TRACE environment
+variable names an output file, in which case the trace is written there
+and the slowest movies are printed when the program exits. While tracing
+is off, span() returns a shared object that does nothing. Spans opened in
+worker processes are not collected.'''
+
+TRACE_ENV = 'GIF_TRACE'
+TOP_N = 10
+
+_enabled = False
+_events = []
+_lock = threading.Lock()
+_local = threading.local()
+
+class _NullSpan(object):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+_NULL_SPAN = _NullSpan()
+
+class _Span(object):
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        stack = getattr(_local, 'stack', None)
+        if stack is None:
+            stack = _local.stack = []
+        self.parent = stack[-1] if stack else None
+        stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        _local.stack.pop()
+        event = {'name': self.name,
+                 'ph': 'X',
+                 'ts': self.start * 1e6,
+                 'dur': (end - self.start) * 1e6,
+                 'pid': os.getpid(),
+                 'tid': threading.get_ident(),
+                 'args': self.attrs}
+        with _lock:
+            _events.append((event, self))
+        return False
+
+    def is_outer(self):
+        """
+        Whether this is the outermost span of its movie, i.e. its parent
+        has a different movie or none. Attributes can be set late, so this
+        is only decided once the spans have closed.
+        """
+        return self.parent is None or self.parent.attrs.get('movie') != self.attrs.get('movie')
+
+    def set(self, **attrs):
+        """
+        Adds attributes that are only known once the span has started.
+        """
+        self.attrs.update(attrs)
+
+def span(name, **attrs):
+    """
+    Returns a context manager timing the code it wraps as a span called
+    name, nested under any span that is open in the same thread. attrs
+    are recorded with it; a 'movie' attribute groups spans by movie.
+    """
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(name, attrs)
+
+def enable():
+    global _enabled
+    _enabled = True
+
+def disable():
+    global _enabled
+    _enabled = False
+
+def is_enabled():
+    return _enabled
+
+def reset():
+    """
+    Discards every recorded span.
+    """
+    with _lock:
+        del _events[:]
+
+# ----------------------- OUTPUT -----------------------
+def write_chrome_trace(out_fn):
+    """
+    Writes the recorded spans in the Chrome trace event format, which can be
+    opened in chrome://tracing or Perfetto.
+    """
+    with _lock:
+        events = [event for event, _ in _events]
+    with open(out_fn, 'w') as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+def slowest_movies(n=TOP_N):
+    """
+    Returns the n movies with the most traced time, as a list of
+    (movie, total seconds, {span name: seconds}) sorted slowest first.
+    A movie's total adds up its outermost spans, so nested spans are not
+    counted twice; the breakdown adds up every span of the movie by name.
+    """
+    totals = defaultdict(float)
+    breakdowns = defaultdict(lambda: defaultdict(float))
+    with _lock:
+        events = list(_events)
+    for event, traced_span in events:
+        movie = event['args'].get('movie')
+        if movie is None:
+            continue
+        seconds = event['dur'] / 1e6
+        if traced_span.is_outer():
+            totals[movie] += seconds
+        breakdowns[movie][event['name']] += seconds
+    ordered = sorted(totals.items(), key=lambda x: x[1], reverse=True)[:n]
+    return [(movie, seconds, dict(breakdowns[movie])) for movie, seconds in ordered]
+
+def print_summary(n=TOP_N):
+    """
+    Prints the time spent in each kind of span and the n slowest movies.
+    """
+    per_name = defaultdict(lambda: [0, 0.0])
+    with _lock:
+        events = list(_events)
+    for event, _ in events:
+        per_name[event['name']][0] += 1
+        per_name[event['name']][1] += event['dur'] / 1e6
+    print('TRACE SUMMARY')
+    for name, (count, seconds) in sorted(per_name.items(), key=lambda x: x[1][1], reverse=True):
+        print('{:<28} {:>8} spans  {:.4f}s'.format(name, count, seconds))
+    print('Slowest {} movies:'.format(n))
+    for movie, seconds, breakdown in slowest_movies(n):
+        stages = ', '.join(['{} {:.4f}s'.format(name, s) for name, s in
+                            sorted(breakdown.items(), key=lambda x: x[1], reverse=True)])
+        print('{:.4f}s  {}  ({})'.format(seconds, movie, stages))
+    print('----------------------------')
+
+def _write_at_exit(out_fn):
+    write_chrome_trace(out_fn)
+    print_summary()
+    print('Trace written to {}'.format(out_fn))
+
+if os.environ.get(TRACE_ENV):
+    enable()
+    atexit.register(_write_at_exit, os.environ[TRACE_ENV])